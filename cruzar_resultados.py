@@ -6,6 +6,9 @@ Si existe nombres_nadadores.csv (columnas epc, nombre, categoria, sexo), se usa
 """
 import csv
 import io
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import itemgetter
 
 # Archivos por defecto
 PLANILLA_CSV = "tags_para_registro.csv"
@@ -13,6 +16,12 @@ NOMBRES_CSV = "nombres_nadadores.csv"  # Opcional: epc, nombre, categoria, sexo
 RESULTADOS_CSV = "resultados_nadadores.csv"
 SALIDA_CSV = "resultados_con_nadadores.csv"
 
+# Búfer de escritura del CSV de salida (menos llamadas a write en eventos grandes)
+_BUFFER_SALIDA = 1 << 20
+
+# Datos de nadador vacíos para EPCs sin cruce (ver lookup en cruzar_resultados)
+_SIN_DATOS = ("", "", "", "", "", "", "")
+
 
 def _segundos_a_hhmmss(segundos) -> str:
     """Convierte segundos (float o string numérico) a hh:mm:ss.ccc."""
@@ -30,19 +39,37 @@ def _segundos_a_hhmmss(segundos) -> str:
     return f"{h:02d}:{m:02d}:{sec:06.3f}"
 
 
+_HEX_MAYUS = frozenset("0123456789ABCDEF")
+
+
+@lru_cache(maxsize=8192)
 def _normalizar_epc(epc: str) -> str:
     """EPC sin espacios, mayúsculas; si tiene más de 24 hex se usan los últimos 24 (ej. 00E280... → E280...)."""
-    s = (epc or "").replace(" ", "").strip().upper()
-    s = "".join(c for c in s if c in "0123456789ABCDEF")
+    # Caso común: EPC ya normalizado (solo hex en mayúsculas, ≤24 chars) → se devuelve tal cual
+    if epc and len(epc) <= 24 and _HEX_MAYUS.issuperset(epc):
+        return epc
+    s = "".join(c for c in (epc or "").upper() if c in _HEX_MAYUS)
     if len(s) > 24:
         s = s[-24:]
     return s
 
 
-def _leer_archivo_texto(archivo: str) -> str:
-    """Lee el archivo probando utf-8, cp1252 y latin-1 (p. ej. CSV de Excel en Windows)."""
-    with open(archivo, "rb") as f:
-        raw = f.read()
+def _es_archivo_abierto(archivo) -> bool:
+    """True si archivo es un objeto tipo archivo (io.StringIO, archivo abierto...) y no una ruta."""
+    return hasattr(archivo, "read") or hasattr(archivo, "write")
+
+
+def _leer_archivo_texto(archivo) -> str:
+    """Lee el archivo probando utf-8, cp1252 y latin-1 (p. ej. CSV de Excel en Windows).
+    Acepta también un objeto tipo archivo abierto en modo texto o binario."""
+    if _es_archivo_abierto(archivo):
+        raw = archivo.read()
+        if isinstance(raw, str):
+            return raw
+    else:
+        # Sin búfer intermedio: read() del archivo crudo reserva el tamaño del archivo y lo lee de una vez
+        with open(archivo, "rb", buffering=0) as f:
+            raw = f.read()
     for enc in ("utf-8", "cp1252", "latin-1"):
         try:
             return raw.decode(enc)
@@ -51,37 +78,97 @@ def _leer_archivo_texto(archivo: str) -> str:
     return raw.decode("utf-8", errors="replace")
 
 
-def _cargar_datos_nadadores_por_epc(archivo: str) -> dict:
+def _indices_cabecera(cabecera: list) -> dict:
+    """Nombre de columna normalizado (sin BOM ni espacios, minúsculas) -> índice."""
+    return {c.strip().lstrip("\ufeff").lower(): i for i, c in enumerate(cabecera)}
+
+
+def _columna(indices: dict, *nombres: str):
+    """Índice de la primera columna presente entre nombres, o None."""
+    for nombre in nombres:
+        if nombre in indices:
+            return indices[nombre]
+    return None
+
+
+def _celda(row: list, i) -> str:
+    """Valor de la columna i de la fila, o "" si la columna no está o la fila es más corta."""
+    return row[i] if i is not None and i < len(row) else ""
+
+
+def _cargar_nombres_por_epc(archivo) -> dict:
+    """Carga EPC -> nombre desde un CSV con columnas epc (o epc_formateado) y nombre (o nombre_nadador).
+    Las claves se normalizan con _normalizar_epc, igual que en el resto de cargas del cruce."""
+    out = {}
+    try:
+        contenido = _leer_archivo_texto(archivo)
+    except FileNotFoundError:
+        return out
+    reader = csv.reader(io.StringIO(contenido))
+    cabecera = next(reader, None)
+    if not cabecera:
+        return out
+    indices = _indices_cabecera(cabecera)
+    i_epc = _columna(indices, "epc", "epc_formateado")
+    i_nombre = _columna(indices, "nombre", "nombre_nadador")
+    if i_epc is None or i_nombre is None:
+        return out
+    minimo = max(i_epc, i_nombre) + 1
+    filas = [row for row in reader if len(row) >= minimo]
+    # Por columnas, con map en C: EPC normalizado y nombre sin espacios
+    claves = map(_normalizar_epc, map(itemgetter(i_epc), filas))
+    nombres = map(str.strip, map(itemgetter(i_nombre), filas))
+    # Solo pares con EPC y nombre no vacíos (all sobre la tupla); el último EPC repetido gana
+    out.update(filter(all, zip(claves, nombres)))
+    return out
+
+
+def _cargar_datos_nadadores_por_epc(archivo) -> dict:
     """Carga CSV con columnas epc, nombre, categoria, sexo. Acepta BOM y variantes (categoria_nombre, genero)."""
     out = {}
     try:
         contenido = _leer_archivo_texto(archivo)
-        reader = csv.DictReader(io.StringIO(contenido))
-        if not reader.fieldnames:
-            return out
-        keys = {k.strip().lstrip("\ufeff").lower(): k for k in reader.fieldnames}
-        col_epc = keys.get("epc") or keys.get("epc_formateado") or reader.fieldnames[0]
-        col_nombre = keys.get("nombre") or keys.get("nombre_nadador") or (reader.fieldnames[1] if len(reader.fieldnames) > 1 else "")
-        col_categoria = keys.get("categoria") or keys.get("categoria_nombre")
-        col_sexo = keys.get("sexo") or keys.get("genero")
-        for row in reader:
-            epc = (row.get(col_epc) or "").strip()
-            key = _normalizar_epc(epc)
-            if not key:
-                continue
-            nombre = (row.get(col_nombre) or "").strip() if col_nombre else ""
-            categoria = (row.get(col_categoria) or "").strip() if col_categoria else ""
-            genero = (row.get(col_sexo) or "").strip() if col_sexo else ""
-            out[key] = {
-                "nombre": nombre,
-                "categoria_nombre": categoria,
-                "genero": genero,
-            }
     except FileNotFoundError:
-        pass
+        return out
+    reader = csv.reader(io.StringIO(contenido))
+    cabecera = next(reader, None)
+    if not cabecera:
+        return out
+    # Índices de columna resueltos una vez desde la cabecera; cada fila se lee por posición
+    indices = _indices_cabecera(cabecera)
+    i_epc = _columna(indices, "epc", "epc_formateado")
+    if i_epc is None:
+        i_epc = 0
+    i_nombre = _columna(indices, "nombre", "nombre_nadador")
+    if i_nombre is None and len(cabecera) > 1:
+        i_nombre = 1
+    i_categoria = _columna(indices, "categoria", "categoria_nombre")
+    i_sexo = _columna(indices, "sexo", "genero")
+    ancho = len(cabecera)
+    for row in reader:
+        if len(row) < ancho:
+            row += [""] * (ancho - len(row))
+        key = _normalizar_epc(row[i_epc].strip())
+        if not key:
+            continue
+        out[key] = {
+            "nombre": row[i_nombre].strip() if i_nombre is not None else "",
+            "categoria_nombre": row[i_categoria].strip() if i_categoria is not None else "",
+            "genero": row[i_sexo].strip() if i_sexo is not None else "",
+        }
     return out
 
 
+@contextmanager
+def _abrir_salida(salida):
+    """Abre la ruta de salida para escribir; un objeto tipo archivo se usa tal cual y no se cierra."""
+    if _es_archivo_abierto(salida):
+        yield salida
+    else:
+        with open(salida, "w", encoding="utf-8", newline="", buffering=_BUFFER_SALIDA) as f:
+            yield f
+
+
 def cruzar_resultados(
     planilla_csv: str = PLANILLA_CSV,
     resultados_csv: str = RESULTADOS_CSV,
@@ -92,13 +179,21 @@ def cruzar_resultados(
     Lee la planilla de EPCs, opcionalmente nombres_nadadores.csv (epc, nombre, categoria, sexo),
     y los resultados de carrera; cruza por EPC y escribe resultados_con_nadadores.csv
     con posición, EPC, nombre, categoría, género (del archivo de nombres o planilla), número corredor, distancia, tiempos.
+    Cada argumento puede ser una ruta o un objeto tipo archivo (p. ej. io.StringIO); si la salida
+    es un objeto tipo archivo no se genera la clasificación (necesita la ruta del CSV).
     """
     try:
         contenido = _leer_archivo_texto(planilla_csv)
-        reader = csv.DictReader(io.StringIO(contenido))
-        if not reader.fieldnames:
-            return False
-        planilla = list(reader)
+    except FileNotFoundError:
+        return False
+    planilla = csv.reader(io.StringIO(contenido))
+    cabecera_planilla = next(planilla, None)
+    if not cabecera_planilla:
+        return False
+
+    # Resultados antes que el archivo de nombres: si faltan no se carga nada más
+    try:
+        contenido_resultados = _leer_archivo_texto(resultados_csv)
     except FileNotFoundError:
         return False
 
@@ -107,35 +202,52 @@ def cruzar_resultados(
     if lookup_datos:
         print(f"  Datos de cruce cargados: {len(lookup_datos)} filas desde {nombres_csv}")
 
-    # Diccionario EPC normalizado -> datos del nadador (planilla)
+    # Columnas de la planilla por posición (None si la columna no está)
+    indices = {nombre: i for i, nombre in enumerate(cabecera_planilla)}
+    (i_epc, i_nombre, i_nombre_nadador, i_numero, i_categoria, i_genero,
+     i_distancia, i_edad_min, i_edad_max) = (
+        indices.get(nombre) for nombre in (
+            "epc_formateado", "nombre", "nombre_nadador", "numero_corredor", "categoria_nombre",
+            "genero", "distancia", "edad_min", "edad_max",
+        )
+    )
+
+    # Diccionario EPC normalizado -> fila ya cruzada (planilla + archivo de nombres):
+    # (nombre, numero_corredor, categoria_nombre, genero, distancia, edad_min, edad_max).
+    # Se arma en una pasada desde la planilla; si un EPC se repite, gana la última fila
     lookup = {}
     for row in planilla:
-        epc_fmt = row.get("epc_formateado", "")
-        epc_key = _normalizar_epc(epc_fmt)
+        epc_key = _normalizar_epc(_celda(row, i_epc))
         if epc_key:
-            lookup[epc_key] = {
-                "nombre": row.get("nombre", "").strip() or row.get("nombre_nadador", "").strip(),
-                "numero_corredor": row.get("numero_corredor", ""),
-                "categoria_nombre": row.get("categoria_nombre", ""),
-                "genero": row.get("genero", ""),
-                "distancia": row.get("distancia", ""),
-                "edad_min": row.get("edad_min", ""),
-                "edad_max": row.get("edad_max", ""),
-            }
+            lookup[epc_key] = (
+                _celda(row, i_nombre).strip() or _celda(row, i_nombre_nadador).strip(),
+                _celda(row, i_numero),
+                _celda(row, i_categoria),
+                _celda(row, i_genero),
+                _celda(row, i_distancia),
+                _celda(row, i_edad_min),
+                _celda(row, i_edad_max),
+            )
+    # Nombre, categoría y género del archivo de nombres tienen prioridad sobre la planilla
+    for epc_key in lookup_datos.keys() & lookup.keys():
+        datos = lookup_datos[epc_key]
+        nombre, numero, categoria, genero, *resto = lookup[epc_key]
+        lookup[epc_key] = (
+            datos["nombre"] or nombre,
+            numero,
+            datos["categoria_nombre"] or categoria,
+            datos["genero"] or genero,
+            *resto,
+        )
 
     if not lookup:
         return False
 
-    try:
-        contenido = _leer_archivo_texto(resultados_csv)
-    except FileNotFoundError:
-        return False
-
-    # Parsear CSV: puede tener primera fila "inicio_punto_cero,..."
+    # Parsear CSV: la fila "inicio_punto_cero,..." puede estar en cualquier lugar (la última gana)
+    # y hace falta antes de escribir la salida; las filas de datos se cruzan al escribirla
     filas_resultados = []
     inicio_punto_cero = None
-    r = csv.reader(io.StringIO(contenido))
-    for row in r:
+    for row in csv.reader(io.StringIO(contenido_resultados)):
         if not row:
             continue
         if row[0] == "inicio_punto_cero":
@@ -145,63 +257,66 @@ def cruzar_resultados(
             continue
         filas_resultados.append(row)
 
-    # Filas: posicion, epc, nombre, ..., validacion (epc_en_planilla)
-    filas_salida = []
     cabecera = [
         "posicion", "epc", "nombre", "numero_corredor", "categoria_nombre", "genero", "distancia",
         "hora_llegada", "tiempo_carrera_s", "tiempo_carrera", "antena", "rssi", "edad_min", "edad_max",
         "epc_en_planilla"
     ]
-    filas_salida.append(cabecera)
 
     epcs_no_en_planilla = []
 
-    for row in filas_resultados:
-        if len(row) < 2:
-            continue
-        posicion, epc = row[0], row[1]
-        hora_llegada = row[2] if len(row) > 2 else ""
-        tiempo_carrera_s = row[3] if len(row) > 3 else ""
-        antena = row[4] if len(row) > 4 else ""
-        rssi = row[5] if len(row) > 5 else ""
-
-        epc_key = _normalizar_epc(epc)
-        nadador = lookup.get(epc_key, {})
-        en_planilla = epc_key in lookup
-        if not en_planilla and epc_key:
-            epcs_no_en_planilla.append(epc.strip())
-
-        # Cruce: nombre, categoría y género del archivo de nombres (epc, nombre, categoria, sexo) o de la planilla
-        datos_cruce = lookup_datos.get(epc_key, {})
-        nombre = (datos_cruce.get("nombre") or "").strip() or nadador.get("nombre", "")
-        categoria_nombre = (datos_cruce.get("categoria_nombre") or "").strip() or nadador.get("categoria_nombre", "")
-        genero = (datos_cruce.get("genero") or "").strip() or nadador.get("genero", "")
-
-        tiempo_carrera_fmt = _segundos_a_hhmmss(tiempo_carrera_s)
-        validacion = "sí" if en_planilla else "no"
-        filas_salida.append([
-            posicion,
-            epc,
-            nombre,
-            nadador.get("numero_corredor", ""),
-            categoria_nombre,
-            genero,
-            nadador.get("distancia", ""),
-            hora_llegada,
-            tiempo_carrera_s,
-            tiempo_carrera_fmt,
-            antena,
-            rssi,
-            nadador.get("edad_min", ""),
-            nadador.get("edad_max", ""),
-            validacion,
-        ])
-
-    with open(salida_csv, "w", encoding="utf-8", newline="") as f:
+    # EPCs que solo están en el archivo de nombres: se rellenan nombre, categoría y género
+    solo_nombres = {
+        epc_key: (datos["nombre"], "", datos["categoria_nombre"], datos["genero"], "", "", "")
+        for epc_key, datos in lookup_datos.items()
+        if epc_key not in lookup
+    }
+
+    # Cada fila cruzada se escribe en cuanto se calcula (sin acumular la salida en memoria)
+    with _abrir_salida(salida_csv) as f:
         w = csv.writer(f)
         if inicio_punto_cero is not None:
             w.writerow(["inicio_punto_cero", inicio_punto_cero])
-        w.writerows(filas_salida)
+        w.writerow(cabecera)
+
+        # Filas: posicion, epc, nombre, ..., validacion (epc_en_planilla)
+        for row in filas_resultados:
+            if len(row) < 2:
+                continue
+            posicion, epc = row[0], row[1]
+            hora_llegada = row[2] if len(row) > 2 else ""
+            tiempo_carrera_s = row[3] if len(row) > 3 else ""
+            antena = row[4] if len(row) > 4 else ""
+            rssi = row[5] if len(row) > 5 else ""
+
+            epc_key = _normalizar_epc(epc)
+            nadador = lookup.get(epc_key)
+            en_planilla = nadador is not None
+            if not en_planilla:
+                if epc_key:
+                    epcs_no_en_planilla.append(epc.strip())
+                nadador = solo_nombres.get(epc_key, _SIN_DATOS)
+            nombre, numero_corredor, categoria_nombre, genero, distancia, edad_min, edad_max = nadador
+
+            tiempo_carrera_fmt = _segundos_a_hhmmss(tiempo_carrera_s)
+            validacion = "sí" if en_planilla else "no"
+            w.writerow([
+                posicion,
+                epc,
+                nombre,
+                numero_corredor,
+                categoria_nombre,
+                genero,
+                distancia,
+                hora_llegada,
+                tiempo_carrera_s,
+                tiempo_carrera_fmt,
+                antena,
+                rssi,
+                edad_min,
+                edad_max,
+                validacion,
+            ])
 
     if epcs_no_en_planilla:
         print(f"  ⚠ Validación: {len(epcs_no_en_planilla)} EPC(s) no están en la planilla:")
@@ -213,6 +328,8 @@ def cruzar_resultados(
             print("     Revisa la columna 'epc_en_planilla' en el CSV (filtrar por 'no').")
 
     # Clasificación por tiempo (CSV + PDF)
+    if _es_archivo_abierto(salida_csv):
+        return True
     try:
         from clasificacion import main as main_clasificacion
         if main_clasificacion(entrada=salida_csv):
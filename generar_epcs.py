@@ -4,9 +4,25 @@ Generador de códigos EPC para tags RFID - Competencias de Natación
 Sistema basado en categorías FECNA (Federación Colombiana de Natación)
 """
 import json
+import sys
+from collections import Counter
+from operator import itemgetter
 from typing import List, Dict
 from datetime import datetime
 
+# JSON: orjson si está instalado (opcional, más rápido); si no, json de la librería estándar
+try:
+    import orjson
+
+    def _json_texto(data) -> str:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
+except ImportError:
+    def _json_texto(data) -> str:
+        return json.dumps(data, indent=2, ensure_ascii=False)
+
+# Byte → 2 caracteres hex en mayúsculas (tabla precalculada)
+_HEX_BYTE = tuple(f'{b:02X}' for b in range(256))
+
 
 class EPCGenerator:
     """Genera códigos EPC estructurados para competencias de natación"""
@@ -42,13 +58,26 @@ class EPCGenerator:
         '1K': 1000,
     }
     
+    # Códigos de categoría en orden FECNA
+    _CODIGOS_CATEGORIA = tuple(CATEGORIAS_FECNA)
+    
+    # Códigos de 1 byte de cada campo del EPC (calculados una vez, al definir la clase)
+    _CAT_BYTE = {cat: i for i, cat in enumerate(CATEGORIAS_FECNA.keys(), 1)}
+    _GEN_BYTE = {'F': 0x01, 'M': 0x02}
+    _DIST_BYTE = {'1K': 0x01, '2K': 0x02, '3K': 0x03, '5K': 0x05}
+    
     def __init__(self, prefijo_evento: str = "2026"):
         """
         Inicializar generador
         prefijo_evento: Identificador del evento (ej: año, código de carrera)
         """
         self.prefijo_evento = prefijo_evento
-        self.tags_generados = []
+        # Año del EPC (2 bytes): depende solo de prefijo_evento
+        self._anio_bytes = bytes.fromhex(self._codigo_anio())
+        # Un dict por tag; generar_epc/generar_epcs_batch devuelven los mismos dicts guardados aquí
+        self.tags_generados: List[Dict] = []
+        # Fecha de generación (una vez por generador), usada en el JSON
+        self._fecha_generacion = datetime.now().isoformat()
     
     @staticmethod
     def calcular_checksum(epc_sin_check: str) -> str:
@@ -60,13 +89,15 @@ class EPCGenerator:
         if len(epc_sin_check) != 22:
             raise ValueError(f"EPC debe tener 22 caracteres hex, tiene {len(epc_sin_check)}")
         
-        checksum = 0
-        # Procesar de 2 en 2 (cada byte)
-        for i in range(0, len(epc_sin_check), 2):
-            byte_val = int(epc_sin_check[i:i+2], 16)
-            checksum ^= byte_val  # XOR
-        
-        return f"{checksum:02X}"
+        # Un solo parseo hex → 11 bytes; XOR de los 8 primeros con los 3 restantes
+        datos = bytes.fromhex(epc_sin_check)
+        acc = int.from_bytes(datos[:8], 'big') ^ int.from_bytes(datos[8:] + bytes(5), 'big')
+        # Plegar 64 → 8 bits (XOR de los 8 bytes del acumulador)
+        acc ^= acc >> 32
+        acc ^= acc >> 16
+        acc ^= acc >> 8
+
+        return _HEX_BYTE[acc & 0xFF]
     
     @staticmethod
     def formato_epc_legible(epc: str) -> str:
@@ -95,59 +126,68 @@ class EPCGenerator:
         if not 1 <= numero_corredor <= 999:
             raise ValueError(f"Número de corredor debe estar entre 1-999")
         
-        # 1. Header EPC estándar (2 chars = 1 byte)
-        header_hex = 'E2'
+        # EPC crudo de 12 bytes, escrito campo por campo
+        raw = bytearray(12)
         
-        # 2. Identificador de evento (2 chars = 1 byte)
-        evento_hex = '80'  # Identificador fijo
+        # 1. Header EPC estándar (1 byte)
+        raw[0] = 0xE2
         
-        # 3. Año (4 chars = 2 bytes)
-        if self.prefijo_evento.isdigit() and len(self.prefijo_evento) >= 4:
-            anio_val = int(self.prefijo_evento[:4])
-            anio_hex = f'{anio_val:04X}'
-        else:
-            anio_hex = '07EA'  # 2026 en hex
+        # 2. Identificador de evento (1 byte)
+        raw[1] = 0x80  # Identificador fijo
         
-        # 4. Distancia (2 chars = 1 byte)
-        dist_map = {'1K': '01', '2K': '02', '3K': '03', '5K': '05'}
-        dist_hex = dist_map.get(distancia, '00')
+        # 3. Año (2 bytes)
+        raw[2:4] = self._anio_bytes
         
-        # 5. Categoría (2 chars = 1 byte)
-        cat_codes = {cat: f'{i:02X}' for i, cat in enumerate(self.CATEGORIAS_FECNA.keys(), 1)}
-        cat_hex = cat_codes.get(categoria, '00')
+        # 4. Distancia (1 byte)
+        raw[4] = self._DIST_BYTE[distancia]
         
-        # 6. Género (2 chars = 1 byte)
-        gen_hex = '01' if genero == 'F' else '02'
+        # 5. Categoría (1 byte)
+        raw[5] = self._CAT_BYTE[categoria]
         
-        # 7. Número de corredor (6 chars = 3 bytes)
-        corredor_hex = f'{numero_corredor:06X}'
+        # 6. Género (1 byte)
+        raw[6] = self._GEN_BYTE[genero]
         
-        # 8. Reserved/padding (2 chars = 1 byte)
-        reserved_hex = '00'
+        # 7. Número de corredor (3 bytes)
+        raw[7:10] = numero_corredor.to_bytes(3, 'big')
         
-        # Ensamblar EPC sin checksum (22 chars = 11 bytes)
-        epc_sin_check = (header_hex + evento_hex + anio_hex + dist_hex + 
-                        cat_hex + gen_hex + corredor_hex + reserved_hex)
-        
-        # Verificar longitud
-        if len(epc_sin_check) != 22:
-            raise ValueError(f"Error interno: EPC tiene {len(epc_sin_check)} chars, esperados 22")
+        # 8. Reserved/padding (1 byte): raw[10] = 0x00
         
-        # 9. Calcular checksum (2 chars = 1 byte)
-        checksum = self.calcular_checksum(epc_sin_check)
+        # 9. Checksum: XOR de los 11 bytes anteriores (1 byte)
+        checksum_val = 0
+        for b in raw[:11]:
+            checksum_val ^= b
+        raw[11] = checksum_val
         
         # EPC completo (24 chars = 12 bytes)
-        epc_completo = epc_sin_check + checksum
+        epc_completo = raw.hex().upper()
+        checksum = epc_completo[22:]
         
         # Crear registro completo
-        tag_info = {
+        tag_info = self._registro_tag(epc_completo, categoria, genero, distancia,
+                                      numero_corredor, checksum)
+        
+        self.tags_generados.append(tag_info)
+        return tag_info
+    
+    def _codigo_anio(self) -> str:
+        """Año del evento en hex (4 chars = 2 bytes), tomado de prefijo_evento"""
+        if self.prefijo_evento.isdigit() and len(self.prefijo_evento) >= 4:
+            anio_val = int(self.prefijo_evento[:4])
+            return f'{anio_val:04X}'
+        return '07EA'  # 2026 en hex
+    
+    def _registro_tag(self, epc_completo: str, categoria: str, genero: str,
+                      distancia: str, numero_corredor: int, checksum: str) -> Dict:
+        """Arma el dict de metadata de un tag a partir de su EPC completo"""
+        nombre_cat, edad_min, edad_max = self.CATEGORIAS_FECNA[categoria]
+        return {
             'epc': epc_completo,
             'epc_formateado': self.formato_epc_legible(epc_completo),
             'numero_corredor': numero_corredor,
             'categoria_codigo': categoria,
-            'categoria_nombre': self.CATEGORIAS_FECNA[categoria][0],
-            'edad_min': self.CATEGORIAS_FECNA[categoria][1],
-            'edad_max': self.CATEGORIAS_FECNA[categoria][2],
+            'categoria_nombre': nombre_cat,
+            'edad_min': edad_min,
+            'edad_max': edad_max,
             'genero': self.GENERO[genero],
             'genero_codigo': genero,
             'distancia': self.DISTANCIAS[distancia],
@@ -155,9 +195,65 @@ class EPCGenerator:
             'prefijo_evento': self.prefijo_evento,
             'checksum': checksum
         }
+    
+    def generar_epcs_batch(self, categorias: List[str], generos: List[str],
+                           distancias: List[str], numeros: List[int]) -> List[Dict]:
+        """
+        Genera un lote de EPCs a partir de columnas paralelas
+        (categoria[i], genero[i], distancia[i], numeros[i]) describen el tag i.
         
-        self.tags_generados.append(tag_info)
-        return tag_info
+        Valida todo el lote antes de generar y arma las partes constantes del EPC
+        (header + evento + año) una sola vez. Retorna la lista de dicts, con el
+        mismo formato que generar_epc()
+        """
+        if not len(categorias) == len(generos) == len(distancias) == len(numeros):
+            raise ValueError("Las columnas del lote deben tener la misma longitud")
+        
+        # Validaciones (una vez por valor distinto, no por tag)
+        for categoria in set(categorias):
+            if categoria not in self.CATEGORIAS_FECNA:
+                raise ValueError(f"Categoría inválida: {categoria}")
+        for genero in set(generos):
+            if genero not in self.GENERO:
+                raise ValueError(f"Género inválido: {genero}")
+        for distancia in set(distancias):
+            if distancia not in self.DISTANCIAS:
+                raise ValueError(f"Distancia inválida: {distancia}")
+        if any(not 1 <= n <= 999 for n in numeros):
+            raise ValueError(f"Número de corredor debe estar entre 1-999")
+        
+        # Partes del EPC comunes a todo el lote (header + evento + año = 4 bytes)
+        prefijo = b'\xE2\x80' + self._anio_bytes
+        prefijo_xor = prefijo[0] ^ prefijo[1] ^ prefijo[2] ^ prefijo[3]
+        dist_byte, cat_byte, gen_byte = self._DIST_BYTE, self._CAT_BYTE, self._GEN_BYTE
+        
+        # Un buffer de 12 bytes por tag: se escriben los bytes crudos y el checksum
+        # (XOR de los 11 primeros) y todo el lote se pasa a hex en una sola llamada
+        buf = bytearray(12 * len(numeros))
+        j = 0
+        for categoria, genero, distancia, numero in zip(categorias, generos, distancias, numeros):
+            d, c, g = dist_byte[distancia], cat_byte[categoria], gen_byte[genero]
+            n2, n1, n0 = (numero >> 16) & 0xFF, (numero >> 8) & 0xFF, numero & 0xFF
+            buf[j:j + 4] = prefijo
+            buf[j + 4] = d
+            buf[j + 5] = c
+            buf[j + 6] = g
+            buf[j + 7] = n2
+            buf[j + 8] = n1
+            buf[j + 9] = n0
+            # buf[j + 10] = 0x00 (reserved)
+            buf[j + 11] = prefijo_xor ^ d ^ c ^ g ^ n2 ^ n1 ^ n0
+            j += 12
+        hex_lote = buf.hex().upper()
+        
+        # Un dict por tag (mismo formato que generar_epc), con el EPC ya en hex
+        nuevos = [
+            self._registro_tag(hex_lote[i:i + 24], categoria, genero, distancia, numero, hex_lote[i + 22:i + 24])
+            for i, categoria, genero, distancia, numero
+            in zip(range(0, len(hex_lote), 24), categorias, generos, distancias, numeros)
+        ]
+        self.tags_generados.extend(nuevos)
+        return nuevos
     
     def generar_lote_carreras(self, config_carreras: List[Dict]) -> List[Dict]:
         """
@@ -182,23 +278,27 @@ class EPCGenerator:
             }
         ]
         """
-        tags_generados = []
+        # Expandir la configuración a columnas (una fila por tag), con tamaño final conocido
+        total = sum(cantidad for carrera in config_carreras
+                    for _, _, cantidad in carrera['categorias'] if cantidad > 0)
+        categorias, generos, distancias, numeros = ([None] * total for _ in range(4))
         
+        i = 0
         for carrera in config_carreras:
             distancia = carrera['distancia']
             
             for categoria, genero, cantidad in carrera['categorias']:
-                # Generar tags para esta categoría/género
-                for i in range(1, cantidad + 1):
-                    tag = self.generar_epc(
-                        categoria=categoria,
-                        genero=genero,
-                        distancia=distancia,
-                        numero_corredor=i
-                    )
-                    tags_generados.append(tag)
-        
-        return tags_generados
+                if cantidad <= 0:
+                    continue
+                # Corredores 1..cantidad para esta categoría/género
+                fin = i + cantidad
+                categorias[i:fin] = [categoria] * cantidad
+                generos[i:fin] = [genero] * cantidad
+                distancias[i:fin] = [distancia] * cantidad
+                numeros[i:fin] = range(1, cantidad + 1)
+                i = fin
+        
+        return self.generar_epcs_batch(categorias, generos, distancias, numeros)
     
     def generar_distribucion_automatica(self, 
                                        total_nadadores: int,
@@ -238,10 +338,9 @@ class EPCGenerator:
 
             # Determinar categorías a usar
             if usar_todas_categorias:
-                categorias_usar = list(self.CATEGORIAS_FECNA.keys())
+                categorias_usar = self._CODIGOS_CATEGORIA
             else:
-                categorias_usar = dist_config.get('categorias_enfoque',
-                                                  list(self.CATEGORIAS_FECNA.keys()))
+                categorias_usar = dist_config.get('categorias_enfoque', self._CODIGOS_CATEGORIA)
 
             # Nadadores por género: tú defines cantidad_femenino y/o cantidad_masculino
             cant_f = dist_config.get('cantidad_femenino')
@@ -298,27 +397,19 @@ class EPCGenerator:
         Distribuye nadadores equitativamente entre categorías
         Retorna dict {categoria: cantidad}
         """
-        if total == 0 or not categorias:
-            return {cat: 0 for cat in categorias}
+        if not categorias:
+            return {}
         
-        # Distribución base
-        por_categoria = total // len(categorias)
-        resto = total % len(categorias)
-        
-        distribucion = {}
-        for i, cat in enumerate(categorias):
-            distribucion[cat] = por_categoria
-            # Distribuir el resto en las primeras categorías
-            if i < resto:
-                distribucion[cat] += 1
-        
-        return distribucion
+        # Distribución base; el resto va a las primeras categorías
+        por_categoria, resto = divmod(total, len(categorias))
+        cantidades = [por_categoria + 1] * resto + [por_categoria] * (len(categorias) - resto)
+        return dict(zip(categorias, cantidades))
     
     def exportar_csv(self, filename: str = 'tags_rfid.csv'):
         """Exporta tags a CSV para fácil impresión"""
         import csv
         
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
+        with open(filename, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
             if not self.tags_generados:
                 print("⚠ No hay tags para exportar")
                 return
@@ -326,11 +417,9 @@ class EPCGenerator:
             campos = ['epc_formateado', 'numero_corredor', 'categoria_nombre', 
                      'genero', 'distancia', 'edad_min', 'edad_max']
             
-            writer = csv.DictWriter(f, fieldnames=campos)
-            writer.writeheader()
-            
-            for tag in self.tags_generados:
-                writer.writerow({k: tag[k] for k in campos})
+            writer = csv.writer(f)
+            writer.writerow(campos)
+            writer.writerows(map(itemgetter(*campos), self.tags_generados))
         
         print(f"✓ CSV exportado: {filename}")
     
@@ -338,13 +427,15 @@ class EPCGenerator:
         """Exporta tags a JSON con metadata completa"""
         data = {
             'evento': self.prefijo_evento,
-            'fecha_generacion': datetime.now().isoformat(),
+            'fecha_generacion': self._fecha_generacion,
             'total_tags': len(self.tags_generados),
             'tags': self.tags_generados
         }
         
+        # Serializar en memoria y escribir de una vez (UTF-8, sin escapar acentos); en modo
+        # texto, como antes, para conservar los fines de línea de la plataforma (CRLF en Windows)
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write(_json_texto(data))
         
         print(f"✓ JSON exportado: {filename}")
     
@@ -353,22 +444,35 @@ class EPCGenerator:
         Exporta solo los códigos EPC en formato simple para copiar al writer
         Un EPC por línea, sin espacios
         """
-        with open(filename, 'w', encoding='utf-8') as f:
-            for tag in self.tags_generados:
-                f.write(f"{tag['epc']}\n")
+        epcs = [tag['epc'] for tag in self.tags_generados]
+        # Un solo write con todo el contenido (24 bytes por EPC)
+        with open(filename, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            if epcs:
+                f.write('\n'.join(epcs) + '\n')
         
         print(f"✓ EPCs para writer: {filename}")
+    
+    def exportar_todo(self, archivo_writer: str = 'epcs_para_writer.txt',
+                      archivo_csv: str = 'tags_para_registro.csv',
+                      archivo_json: str = 'tags_completo.json'):
+        """
+        Exporta EPCs para el writer, CSV y JSON (archivo_json=None lo omite)
+        Un solo punto de entrada para las tres salidas habituales del generador
+        """
+        self.exportar_para_writer(archivo_writer)
+        self.exportar_csv(archivo_csv)
+        if archivo_json:
+            self.exportar_json(archivo_json)
 
     def _obtener_totales_por_genero_y_categoria(self):
         """Calcula totales femeninos/masculinos global y por categoría."""
+        # Un conteo en C por (género, categoría); luego se reparte en pocos grupos
+        conteo = Counter(map(itemgetter('genero_codigo', 'categoria_nombre'), self.tags_generados))
         fem_por_cat = {}
         masc_por_cat = {}
-        for t in self.tags_generados:
-            cat = t.get('categoria_nombre', '')
-            if t.get('genero_codigo') == 'F':
-                fem_por_cat[cat] = fem_por_cat.get(cat, 0) + 1
-            else:
-                masc_por_cat[cat] = masc_por_cat.get(cat, 0) + 1
+        for (genero, cat), cantidad in conteo.items():
+            destino = fem_por_cat if genero == 'F' else masc_por_cat
+            destino[cat] = destino.get(cat, 0) + cantidad
         total_f = sum(fem_por_cat.values())
         total_m = sum(masc_por_cat.values())
         categorias_orden = sorted(set(fem_por_cat.keys()) | set(masc_por_cat.keys()))
@@ -443,29 +547,22 @@ class EPCGenerator:
         print(f"RESUMEN - Total Tags: {len(self.tags_generados)}")
         print("="*70)
         
-        # Agrupar por distancia
-        por_distancia = {}
-        for tag in self.tags_generados:
-            dist = tag['distancia_codigo']
-            if dist not in por_distancia:
-                por_distancia[dist] = []
-            por_distancia[dist].append(tag)
+        # Conteo por (distancia, categoría, género) en una sola pasada sobre los tags
+        grupos = Counter(map(itemgetter('distancia_codigo', 'categoria_codigo', 'genero_codigo'),
+                             self.tags_generados))
+        grupos_ordenados = sorted(grupos.items())
+        # Distancias en orden de aparición
+        distancias = dict.fromkeys(dist for dist, _, _ in grupos)
         
-        for dist, tags in por_distancia.items():
+        for dist in distancias:
             print(f"\n📏 Distancia: {self.DISTANCIAS[dist]}m ({dist})")
             
-            # Agrupar por categoría y género
-            por_categoria = {}
-            for tag in tags:
-                key = (tag['categoria_codigo'], tag['genero_codigo'])
-                if key not in por_categoria:
-                    por_categoria[key] = []
-                por_categoria[key].append(tag)
-            
-            for (cat, gen), tags_grupo in sorted(por_categoria.items()):
+            for (d, cat, gen), cantidad in grupos_ordenados:
+                if d != dist:
+                    continue
                 cat_nombre = self.CATEGORIAS_FECNA[cat][0]
                 gen_nombre = self.GENERO[gen]
-                print(f"  • {cat_nombre} {gen_nombre}: {len(tags_grupo)} tags")
+                print(f"  • {cat_nombre} {gen_nombre}: {cantidad} tags")
         
         print("\n" + "="*70)
     
@@ -555,6 +652,10 @@ def configurar_evento_ejemplo():
 # EJEMPLO DE USO PERSONALIZADO
 # =============================================================================
 
+# Categorías de enfoque de los ejemplos (tuplas fijas, compartidas)
+_ENFOQUE_JUV = ('INF_A', 'INF_B', 'JUV_A', 'JUV_B')
+_ENFOQUE_MAY = ('MAY_A', 'MAY_B', 'MAS_A', 'MAS_B')
+
 def ejemplo_personalizado():
     """
     Ejemplo de cómo crear tu propia configuración
@@ -589,9 +690,7 @@ def ejemplo_personalizado():
     gen.generar_lote_carreras(mis_carreras)
     
     # 4. Exportar
-    gen.exportar_para_writer('mis_epcs.txt')
-    gen.exportar_csv('mis_tags.csv')
-    gen.exportar_json('mis_tags.json')
+    gen.exportar_todo('mis_epcs.txt', 'mis_tags.csv', 'mis_tags.json')
     gen.imprimir_resumen()
     
     return gen
@@ -613,14 +712,14 @@ def ejemplo_distribucion_automatica():
         {
             'distancia': '2K',
             'cantidad': 40,
-            'categorias_enfoque': ['INF_A', 'INF_B', 'JUV_A', 'JUV_B'],
+            'categorias_enfoque': _ENFOQUE_JUV,
             'cantidad_femenino': 20,
             'cantidad_masculino': 20
         },
         {
             'distancia': '3K',
             'cantidad': 60,
-            'categorias_enfoque': ['MAY_A', 'MAY_B', 'MAS_A', 'MAS_B'],
+            'categorias_enfoque': _ENFOQUE_MAY,
             'cantidad_femenino': 33,
             'cantidad_masculino': 27
         }
@@ -637,9 +736,7 @@ def ejemplo_distribucion_automatica():
     gen.generar_lote_carreras(config)
     
     # 5. Exportar
-    gen.exportar_para_writer('epcs_auto.txt')
-    gen.exportar_csv('tags_auto.csv')
-    gen.exportar_json('tags_auto.json')
+    gen.exportar_todo('epcs_auto.txt', 'tags_auto.csv', 'tags_auto.json')
     gen.imprimir_resumen()
     
     print(f"\n💡 Se generaron exactamente {len(gen.tags_generados)} tags")
@@ -664,14 +761,14 @@ def ejemplo_cantidades_exactas():
         {
             'distancia': '2K',
             'cantidad': 35,
-            'categorias_enfoque': ['INF_A', 'INF_B', 'JUV_A', 'JUV_B'],
+            'categorias_enfoque': _ENFOQUE_JUV,
             'cantidad_femenino': 17,
             'cantidad_masculino': 18
         },
         {
             'distancia': '3K',
             'cantidad': 65,
-            'categorias_enfoque': ['MAY_A', 'MAY_B', 'MAS_A', 'MAS_B'],
+            'categorias_enfoque': _ENFOQUE_MAY,
             'cantidad_femenino': 32,
             'cantidad_masculino': 33
         }
@@ -688,9 +785,7 @@ def ejemplo_cantidades_exactas():
     gen.generar_lote_carreras(config)
     
     # 5. Exportar
-    gen.exportar_para_writer('epcs_exactos.txt')
-    gen.exportar_csv('tags_exactos.csv')
-    gen.exportar_json('tags_exactos.json')
+    gen.exportar_todo('epcs_exactos.txt', 'tags_exactos.csv', 'tags_exactos.json')
     gen.imprimir_resumen()
     
     print(f"\n✅ Se generaron {len(gen.tags_generados)} tags")
@@ -721,8 +816,7 @@ def ejemplo_simple_100_tags():
     )
     
     gen.generar_lote_carreras(config)
-    gen.exportar_para_writer('100_tags.txt')
-    gen.exportar_csv('100_tags.csv')
+    gen.exportar_todo('100_tags.txt', '100_tags.csv', archivo_json=None)
     gen.imprimir_resumen()
     
     return gen
@@ -732,19 +826,43 @@ def ejemplo_simple_100_tags():
 # PROGRAMA PRINCIPAL
 # =============================================================================
 
+# Distancias aceptadas al pedirlas por consola (las mismas que codifica el EPC)
+_DISTANCIAS_VALIDAS = frozenset(EPCGenerator.DISTANCIAS)
+
+def _leer_entrada(mensaje: str = "") -> str:
+    """Como input(): muestra el mensaje y lee una línea de stdin (EOFError si se cerró)."""
+    sys.stdout.write(mensaje)
+    sys.stdout.flush()
+    linea = sys.stdin.readline()
+    if not linea:
+        raise EOFError
+    return linea.rstrip('\n')
+
+
 def _pedir_total_nadadores(mensaje="¿Cuántos nadadores en total?"):
     """Pide el total de nadadores hasta obtener un número válido (tú decides el número)."""
     while True:
-        inp = input(f"\n{mensaje} [Enter=100]: ").strip()
+        inp = _leer_entrada(f"\n{mensaje} [Enter=100]: ").strip()
         if not inp:
             inp = "100"
-        if inp.isdigit():
+        try:
             n = int(inp)
-            if n > 0:
-                return n
+        except ValueError:
+            n = 0
+        if n > 0:
+            return n
         print("  ⚠ Escribe un número entero mayor que 0.")
 
 
+def _entero_o_default(inp: str, default: int) -> int:
+    """Entero no negativo de inp; si está vacío, no es número o es negativo, default."""
+    try:
+        n = int(inp)
+    except ValueError:
+        return default
+    return n if n >= 0 else default
+
+
 def _pedir_femenino_masculino(total: int, etiqueta: str = ""):
     """
     Pide cantidad femenino y masculino; verifica que sumen total.
@@ -754,10 +872,10 @@ def _pedir_femenino_masculino(total: int, etiqueta: str = ""):
     default_f = total // 2
     default_m = total - default_f
     while True:
-        inp_f = input(f"  Cantidad FEMENINO{etiqueta} [{default_f}]: ").strip()
-        inp_m = input(f"  Cantidad MASCULINO{etiqueta} [{default_m}]: ").strip()
-        cant_f = int(inp_f) if inp_f.isdigit() else default_f
-        cant_m = int(inp_m) if inp_m.isdigit() else default_m
+        inp_f = _leer_entrada(f"  Cantidad FEMENINO{etiqueta} [{default_f}]: ").strip()
+        inp_m = _leer_entrada(f"  Cantidad MASCULINO{etiqueta} [{default_m}]: ").strip()
+        cant_f = _entero_o_default(inp_f, default_f)
+        cant_m = _entero_o_default(inp_m, default_m)
         suma = cant_f + cant_m
         print(f"  → Verificación: Femenino ({cant_f}) + Masculino ({cant_m}) = {suma}", end="")
         if suma == total:
@@ -767,6 +885,19 @@ def _pedir_femenino_masculino(total: int, etiqueta: str = ""):
         print("  Vuelve a ingresar las cantidades.\n")
 
 
+def _pedir_cantidad_categoria(mensaje: str) -> int:
+    """Pide una cantidad (0 o más) hasta que sea válida; Enter = 0."""
+    while True:
+        inp = _leer_entrada(mensaje).strip()
+        try:
+            cantidad = int(inp) if inp else 0
+        except ValueError:
+            cantidad = -1
+        if cantidad >= 0:
+            return cantidad
+        print("       ⚠ Escribe un número (0 o más).")
+
+
 def _pedir_femeninos_y_masculinos_por_categoria(distancia: str):
     """
     Pide directamente cuántos femeninos y cuántos masculinos hay en cada categoría FECNA.
@@ -780,20 +911,8 @@ def _pedir_femeninos_y_masculinos_por_categoria(distancia: str):
 
     resultado = []
     for codigo, nombre in zip(codigos, nombres):
-        while True:
-            inp_f = input(f"     ¿Cuántos femeninos de categoría {nombre}? ").strip()
-            if inp_f == "" or inp_f.isdigit():
-                f = int(inp_f) if inp_f.isdigit() else 0
-                if f >= 0:
-                    break
-            print("       ⚠ Escribe un número (0 o más).")
-        while True:
-            inp_m = input(f"     ¿Cuántos masculinos de categoría {nombre}? ").strip()
-            if inp_m == "" or inp_m.isdigit():
-                m = int(inp_m) if inp_m.isdigit() else 0
-                if m >= 0:
-                    break
-            print("       ⚠ Escribe un número (0 o más).")
+        f = _pedir_cantidad_categoria(f"     ¿Cuántos femeninos de categoría {nombre}? ")
+        m = _pedir_cantidad_categoria(f"     ¿Cuántos masculinos de categoría {nombre}? ")
         if f > 0:
             resultado.append((codigo, 'F', f))
         if m > 0:
@@ -813,19 +932,20 @@ if __name__ == "__main__":
     print("\n🎯 Indica distancias (hasta 4) y luego, por cada una, cuántos femeninos y masculinos hay en cada categoría.\n")
 
     while True:
-        num_inp = input("¿Cuántas distancias (carreras) simultáneas? (1 a 4): ").strip()
-        if num_inp.isdigit():
+        num_inp = _leer_entrada("¿Cuántas distancias (carreras) simultáneas? (1 a 4): ").strip()
+        try:
             num_distancias = int(num_inp)
-            if 1 <= num_distancias <= 4:
-                break
+        except ValueError:
+            num_distancias = 0
+        if 1 <= num_distancias <= 4:
+            break
         print("  ⚠ Escribe un número entre 1 y 4.")
-    distancias_validas = ('1K', '2K', '3K', '5K')
     config_carreras = []
     for i in range(num_distancias):
         print(f"\n--- Carrera {i + 1} ---")
         while True:
-            d = input(f"  Distancia (1K/2K/3K/5K): ").strip().upper()
-            if d in distancias_validas:
+            d = _leer_entrada(f"  Distancia (1K/2K/3K/5K): ").strip().upper()
+            if d in _DISTANCIAS_VALIDAS:
                 break
             print(f"  ⚠ Usa una de: 1K, 2K, 3K, 5K")
         categorias_lista = _pedir_femeninos_y_masculinos_por_categoria(d)
@@ -846,9 +966,7 @@ if __name__ == "__main__":
     
     # Exportar archivos
     print("\n📁 Exportando archivos...")
-    generador.exportar_para_writer('epcs_para_writer.txt')
-    generador.exportar_csv('tags_para_registro.csv')
-    generador.exportar_json('tags_completo.json')
+    generador.exportar_todo('epcs_para_writer.txt', 'tags_para_registro.csv', 'tags_completo.json')
     generador.exportar_reporte_totales_pdf('reporte_totales.pdf')
     
     print("\n✅ Proceso completado!")
@@ -856,16 +974,7 @@ if __name__ == "__main__":
     print(f"📊 Total de tags generados: {total_gen}")
 
     # Resumen: total femeninos/masculinos global y por categoría
-    fem_por_cat = {}
-    masc_por_cat = {}
-    for t in generador.tags_generados:
-        cat = t.get('categoria_nombre', '')
-        if t.get('genero_codigo') == 'F':
-            fem_por_cat[cat] = fem_por_cat.get(cat, 0) + 1
-        else:
-            masc_por_cat[cat] = masc_por_cat.get(cat, 0) + 1
-    total_f = sum(fem_por_cat.values())
-    total_m = sum(masc_por_cat.values())
+    fem_por_cat, masc_por_cat, total_f, total_m, _ = generador._obtener_totales_por_genero_y_categoria()
 
     print("\n" + "="*70)
     print("📊 RESUMEN GLOBAL")
@@ -880,10 +989,7 @@ if __name__ == "__main__":
     print("="*70)
 
     # Mostrar distribución por distancia
-    por_dist = {}
-    for tag in generador.tags_generados:
-        dist = tag['distancia_codigo']
-        por_dist[dist] = por_dist.get(dist, 0) + 1
+    por_dist = Counter(t['distancia_codigo'] for t in generador.tags_generados)
 
     if len(por_dist) > 1:
         print("\n📏 Distribución por distancia:")
@@ -1,13 +1,32 @@
 #!/usr/bin/env python3
 """Lector RFID R300 YRM200 para control de nadadores. Protocolo: 0xA0 [Len] [ReaderId] [Cmd] [Data] [Checksum]."""
-import csv
+import selectors
 import socket
 import struct
+import sys
 import time
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, List, Tuple
 
 EPC_LEN_HEX = 24
+# Buffer de recepción fijo; se compacta cuando quedan menos de RX_MIN_LIBRE bytes libres
+RX_BUFFER = 64 * 1024
+RX_MIN_LIBRE = 4096
+# Espera máxima (s) por datos del lector; sin datos en ese lapso se rota la antena
+ESPERA_LECTURA = 0.5
+# Con verbose, cada cuánto (s) se imprimen juntas las lecturas acumuladas
+IMPRIMIR_CADA = 0.1
+# Cabecera de trama: 0xA0, Len, ReaderId, Cmd (formato compilado una vez)
+_CABECERA_TRAMA = struct.Struct('BBBB')
+
+# Reloj monotónico (ns) de las lecturas, solo para restar: el tiempo de carrera no se ve
+# afectado por ajustes de la hora del sistema. La hora de llegada se toma con datetime.now().
+try:
+    _monotonic_ns = time.monotonic_ns
+except AttributeError:  # Python 3.6: sin monotonic_ns
+    def _monotonic_ns() -> int:
+        return int(time.monotonic() * 1e9)
 
 
 def es_epc_valido(epc: str) -> bool:
@@ -17,16 +36,44 @@ def es_epc_valido(epc: str) -> bool:
     return not all(c == '0' for c in (epc or "").strip().upper())
 
 
+def _fmt_hms_ms(t: datetime) -> str:
+    """HH:MM:SS.mmm (igual que strftime('%H:%M:%S.%f')[:-3], sin pasar por strftime)."""
+    return f"{t.hour:02d}:{t.minute:02d}:{t.second:02d}.{t.microsecond // 1000:03d}"
+
+
+@lru_cache(maxsize=4096)
+def _epc_hex(epc: bytes) -> str:
+    """EPC en hex mayúsculas; cacheado porque el mismo tag se relee muchas veces."""
+    return epc.hex().upper()
+
+
 class RFIDTag:
-    """Tag RFID detectado (EPC 24 hex, RSSI dBm, antena, timestamp)."""
-    def __init__(self, epc: bytes, rssi: int, antenna: int, timestamp: datetime):
-        self.epc = epc.hex().upper()
+    """Tag RFID detectado (EPC 24 hex, RSSI dBm, antena, timestamp).
+    El lector pasa además ts_ns (reloj monotónico) para el tiempo de carrera; epc (hex) se calcula al pedirlo."""
+    # Se crea uno por lectura: sin __dict__ por instancia (menos memoria en carreras largas)
+    __slots__ = ("epc_bytes", "_epc", "rssi", "antenna", "timestamp", "ts_ns")
+
+    def __init__(self, epc: bytes, rssi: int, antenna: int,
+                 timestamp: Optional[datetime] = None, ts_ns: Optional[int] = None):
+        self.epc_bytes = bytes(epc)
+        self._epc = None
         self.rssi = rssi - 129
         self.antenna = antenna
+        if timestamp is None:
+            timestamp = datetime.now()
+            if ts_ns is None:
+                ts_ns = _monotonic_ns()
         self.timestamp = timestamp
+        self.ts_ns = ts_ns
+
+    @property
+    def epc(self) -> str:
+        if self._epc is None:
+            self._epc = _epc_hex(self.epc_bytes)
+        return self._epc
     
     def __repr__(self):
-        return f"Tag(EPC={self.epc}, RSSI={self.rssi}dBm, Ant={self.antenna}, Time={self.timestamp.strftime('%H:%M:%S.%f')[:-3]})"
+        return f"Tag(EPC={self.epc}, RSSI={self.rssi}dBm, Ant={self.antenna}, Time={_fmt_hms_ms(self.timestamp)})"
 
 
 class RFIDReader:
@@ -35,16 +82,25 @@ class RFIDReader:
     CMD_INVENTORY = 0x89
     CMD_BUFFER = 0x90
     
-    def __init__(self, ip: str, port: int = 6000):
+    def __init__(self, ip: str, port: int = 6000, verbose: bool = False):
         self.ip = ip
         self.port = port
+        self.verbose = verbose  # imprimir cada lectura (en bloques), no solo las llegadas
         self.socket: Optional[socket.socket] = None
-        self.buffer = bytearray()
+        # recv_into escribe directo en self.buffer; lo pendiente está en [_pos, _wpos)
+        self.buffer = bytearray(RX_BUFFER)
+        self._rxmv = memoryview(self.buffer)
+        self._pos = 0
+        self._wpos = 0
         self.running = False
+        self._tx = bytearray(64)  # trama de salida reutilizada por send_command
         
     def connect(self) -> bool:
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # Tramas cortas: sin Nagle (no retener comandos) y buffer de recepción amplio para ráfagas
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
             self.socket.connect((self.ip, self.port))
             print(f"✓ Conectado a {self.ip}:{self.port}")
             try:
@@ -80,18 +136,24 @@ class RFIDReader:
     
     @staticmethod
     def checksum(data: bytes) -> int:
+        """XOR de todos los bytes (el resultado ya cabe en 1 byte)."""
         result = 0
         for b in data:
             result ^= b
-        return result & 0xFF
+        return result
     
     def send_command(self, cmd: int, data: bytes = b'', reader_id: int = 0xFF):
-        data_len = len(data) + 3
-        frame = struct.pack('BBB', self.HEADER, data_len, reader_id)
-        frame += struct.pack('B', cmd) + data
-        frame += struct.pack('B', self.checksum(frame))
+        n = len(data)
+        # La trama se arma sobre el mismo bytearray en cada envío (crece solo si hace falta)
+        if len(self._tx) < n + 5:
+            self._tx = bytearray(n + 5)
+        frame = memoryview(self._tx)[:n + 5]
+        _CABECERA_TRAMA.pack_into(frame, 0, self.HEADER, n + 3, reader_id, cmd)
+        frame[4:4 + n] = data
+        frame[4 + n] = self.checksum(frame[:4 + n])
         
-        self.socket.send(frame)
+        # sendall: un envío parcial no debe perder bytes de la trama
+        self.socket.sendall(frame)
     
     def parse_frame(self, frame: bytes) -> Optional[dict]:
         if len(frame) < 5 or frame[0] != self.HEADER:
@@ -131,7 +193,7 @@ class RFIDReader:
         rssi = rssi_raw & 0x7F
         antenna_raw = ant_no + (4 if rssi_h == 1 else 0) + 1
         antenna = self._clamp_antenna(antenna_raw)
-        return RFIDTag(epc, rssi, antenna, datetime.now())
+        return RFIDTag(epc, rssi, antenna, datetime.now(), _monotonic_ns())
     
     def _clamp_antenna(self, antenna_raw: int) -> int:
         try:
@@ -156,7 +218,7 @@ class RFIDReader:
         rssi = rssi_raw & 0x7F
         antenna_raw = ant_no + (4 if rssi_h == 1 else 0) + 1
         antenna = self._clamp_antenna(antenna_raw)
-        return RFIDTag(epc, rssi, antenna, datetime.now())
+        return RFIDTag(epc, rssi, antenna, datetime.now(), _monotonic_ns())
     
     def read_tags_continuous(self, callback=None, duration: int = None):
         """Lee tags en bucle; callback(tag) por cada uno. duration=None = infinito."""
@@ -175,22 +237,33 @@ class RFIDReader:
         antena_para_asignar = _num_antena(ANTENNAS_ACTIVAS[0]) if ANTENNAS_ACTIVAS else 1
         ultima_antena_rotacion = antena_para_asignar
         ROTAR_ANTENA_CADA = 0.5
+        por_imprimir: List[RFIDTag] = []
+        ultimo_print = time.monotonic()
         
         print("🏊 Iniciando lectura de nadadores...")
         print("=" * 60)
         
+        # Esperar a que haya datos con el selector (sin timeout en el socket ni sondeo)
+        sel = selectors.DefaultSelector()
         try:
+            sel.register(self.socket, selectors.EVENT_READ)
             while self.running:
-                if duration and (time.time() - start_time) > duration:
-                    break
-                try:
-                    data = self.socket.recv(4096)
-                    if not data:
+                espera = ESPERA_LECTURA
+                if duration:
+                    restante = duration - (time.time() - start_time)
+                    if restante <= 0:
                         break
-                    
-                    self.buffer.extend(data)
-                    
-                except socket.timeout:
+                    espera = min(espera, restante)
+                if por_imprimir:
+                    # No esperar más allá del próximo volcado de las lecturas pendientes
+                    espera = min(espera, max(0.0, ultimo_print + IMPRIMIR_CADA - time.monotonic()))
+                if not sel.select(espera):
+                    if por_imprimir:
+                        # Lector en silencio tras una ráfaga: imprimir lo acumulado sin esperar otro paquete
+                        self._imprimir_tags(por_imprimir)
+                        ultimo_print = time.monotonic()
+                        continue
+                    # Sin datos en 'espera' segundos: rotar antena si toca
                     now = time.time()
                     if now - ultimo_ant_cmd >= ROTAR_ANTENA_CADA:
                         ant_num = ANTENNAS_ACTIVAS[antena_idx % n_ant]
@@ -204,19 +277,29 @@ class RFIDReader:
                         ultimo_ant_cmd = now
                     continue
                 
-                while len(self.buffer) > 1:
-                    if self.buffer[0] != self.HEADER:
-                        self.buffer.pop(0)
-                        continue
-                    
-                    if len(self.buffer) < 2:
+                n = self.socket.recv_into(self._rxmv[self._wpos:])
+                if not n:
+                    break
+                self._wpos += n
+                
+                # Avanzar un índice sobre el buffer (sin copiar lo pendiente por cada trama)
+                buf = self.buffer
+                pos = self._pos
+                fin = self._wpos
+                while True:
+                    # Resincronizar en la próxima cabecera (búsqueda en C)
+                    pos = buf.find(self.HEADER, pos, fin)
+                    if pos < 0:
+                        pos = fin
+                        break
+                    if fin - pos < 2:
                         break
-                    data_len = self.buffer[1]
+                    data_len = buf[pos + 1]
                     frame_len = data_len + 2
-                    if len(self.buffer) < frame_len:
+                    if fin - pos < frame_len:
                         break
-                    frame = bytes(self.buffer[:frame_len])
-                    self.buffer = self.buffer[frame_len:]
+                    frame = bytes(self._rxmv[pos:pos + frame_len])
+                    pos += frame_len
                     
                     parsed = self.parse_frame(frame)
                     if not parsed:
@@ -228,53 +311,113 @@ class RFIDReader:
                         tag = self.parse_buffer_tag(parsed['data'])
                     
                     if tag:
+                        # En lectura continua manda la antena de la rotación, no la decodificada de la trama
                         tag.antenna = antena_para_asignar
                         antena_para_asignar = ultima_antena_rotacion
-                        print(tag)
+                        if self.verbose:
+                            por_imprimir.append(tag)
                         if callback:
                             callback(tag)
+                
+                if por_imprimir and time.monotonic() - ultimo_print >= IMPRIMIR_CADA:
+                    self._imprimir_tags(por_imprimir)
+                    ultimo_print = time.monotonic()
+                
+                # Descartar lo ya parseado: si no queda nada se vuelve al inicio; si queda
+                # poco espacio libre, lo pendiente (menos de una trama, < 257 bytes) se mueve
+                # al inicio. Se copia vía bytes: origen y destino son el mismo buffer
+                if pos >= fin:
+                    pos = fin = 0
+                elif len(buf) - fin < RX_MIN_LIBRE:
+                    buf[:fin - pos] = bytes(self._rxmv[pos:fin])
+                    fin -= pos
+                    pos = 0
+                self._pos = pos
+                self._wpos = fin
         
         except KeyboardInterrupt:
             print("\n⏹ Detenido por usuario")
         except Exception as e:
             print(f"\n✗ Error: {e}")
         finally:
+            sel.close()
+            if por_imprimir:
+                self._imprimir_tags(por_imprimir)
             self.running = False
 
+    @staticmethod
+    def _imprimir_tags(tags: List[RFIDTag]):
+        """Imprime las lecturas acumuladas con una sola escritura y vacía la lista."""
+        sys.stdout.write("".join(f"{tag!r}\n" for tag in tags))
+        sys.stdout.flush()
+        tags.clear()
+
 
 class CompetenciaManager:
     """Orden de llegada; punto cero con iniciar_carrera()."""
 
     def __init__(self):
-        self.llegadas: List[Tuple[int, RFIDTag]] = []
+        # Llegadas por columnas (listas paralelas, sin una tupla por llegada): posición, tag y
+        # tiempo de carrera (s); los tiempos se recalculan al cambiar el punto cero
+        self._posiciones: List[int] = []
+        self._tags: List[RFIDTag] = []
+        self._tiempos: List[Optional[float]] = []
         self.tags_registrados = set()
         self.posicion_actual = 1
         self.hora_inicio: Optional[datetime] = None
 
+    @property
+    def llegadas(self) -> List[Tuple[int, RFIDTag]]:
+        """Lista (posición, tag) en orden de llegada (copia armada desde las columnas)."""
+        return list(zip(self._posiciones, self._tags))
+
+    @property
+    def hora_inicio(self) -> Optional[datetime]:
+        return self._hora_inicio
+
+    @hora_inicio.setter
+    def hora_inicio(self, valor: Optional[datetime]):
+        # Punto cero dado como hora: sin instante monotónico, se resta contra timestamp
+        self._fijar_inicio(valor, None)
+
+    def _fijar_inicio(self, hora: Optional[datetime], inicio_ns: Optional[int]):
+        """Fija el punto cero y recalcula de una vez los tiempos de las llegadas ya registradas."""
+        self._hora_inicio = hora
+        self._inicio_ns = inicio_ns
+        self._tiempos = [self._tiempo_carrera(tag) for tag in self._tags]
+
     def iniciar_carrera(self):
-        self.hora_inicio = datetime.now()
-        print(f"⏱ Punto cero fijado: {self.hora_inicio.strftime('%H:%M:%S.%f')[:-3]}\n")
+        # Hora de pared para mostrar/guardar y reloj monotónico para el tiempo de carrera
+        self._fijar_inicio(datetime.now(), _monotonic_ns())
+        print(f"⏱ Punto cero fijado: {_fmt_hms_ms(self.hora_inicio)}\n")
 
     def _tiempo_carrera(self, tag: RFIDTag) -> Optional[float]:
-        if self.hora_inicio is None:
+        if self._hora_inicio is None:
             return None
-        return (tag.timestamp - self.hora_inicio).total_seconds()
+        # Tag leído y punto cero con el mismo reloj monotónico: resta de enteros
+        if tag.ts_ns is not None and self._inicio_ns is not None:
+            return (tag.ts_ns - self._inicio_ns) / 1e9
+        return (tag.timestamp - self._hora_inicio).total_seconds()
 
     def registrar_llegada(self, tag: RFIDTag):
         """Primera detección por EPC; ignora EPCs no válidos (ej. 000000)."""
+        # Relecturas de un tag ya registrado: se descartan por los bytes, sin pasar a hex
+        if tag.epc_bytes in self.tags_registrados:
+            return
         if not es_epc_valido(tag.epc):
             return
-        if tag.epc not in self.tags_registrados:
-            self.llegadas.append((self.posicion_actual, tag))
-            self.tags_registrados.add(tag.epc)
-
-            tiempo_str = tag.timestamp.strftime('%H:%M:%S.%f')[:-3]
-            elapsed = self._tiempo_carrera(tag)
-            if elapsed is not None:
-                print(f"🥇 POSICIÓN {self.posicion_actual}: EPC={tag.epc} | Antena={tag.antenna} | Llegada: {tiempo_str} | Tiempo carrera: {elapsed:.3f} s")
-            else:
-                print(f"🥇 POSICIÓN {self.posicion_actual}: EPC={tag.epc} | Antena={tag.antenna} | {tiempo_str}")
-            self.posicion_actual += 1
+        elapsed = self._tiempo_carrera(tag)
+        self._posiciones.append(self.posicion_actual)
+        self._tags.append(tag)
+        self._tiempos.append(elapsed)
+        self.tags_registrados.add(tag.epc_bytes)
+
+        tiempo_str = _fmt_hms_ms(tag.timestamp)
+        if elapsed is not None:
+            print(f"🥇 POSICIÓN {self.posicion_actual}: EPC={tag.epc} | Antena={tag.antenna} | Llegada: {tiempo_str} | Tiempo carrera: {elapsed:.3f} s")
+        else:
+            print(f"🥇 POSICIÓN {self.posicion_actual}: EPC={tag.epc} | Antena={tag.antenna} | {tiempo_str}")
+        self.posicion_actual += 1
 
     def obtener_resultados(self) -> List[dict]:
         return [
@@ -282,31 +425,30 @@ class CompetenciaManager:
                 'posicion': pos,
                 'epc': tag.epc,
                 'timestamp': tag.timestamp.isoformat(),
-                'tiempo_carrera_s': self._tiempo_carrera(tag),
+                'tiempo_carrera_s': elapsed,
                 'rssi': tag.rssi,
                 'antenna': tag.antenna
             }
-            for pos, tag in self.llegadas
+            for pos, tag, elapsed in zip(self._posiciones, self._tags, self._tiempos)
         ]
 
+    @staticmethod
+    def _linea_resultado(pos: int, tag: RFIDTag, elapsed: Optional[float]) -> str:
+        """Línea del CSV de resultados para una llegada (campos numéricos/hex: sin comillas)."""
+        tiempo = f"{elapsed:.3f}" if elapsed is not None else ""
+        return f"{pos},{tag.epc},{_fmt_hms_ms(tag.timestamp)},{tiempo},{tag.antenna},{tag.rssi}\r\n"
+
     def guardar_resultados(self, nombre_base: str = 'resultados_nadadores'):
         filename_csv = f"{nombre_base}.csv"
 
-        with open(filename_csv, 'w', encoding='utf-8', newline='') as f:
-            w = csv.writer(f)
+        # Esquema fijo y campos sin comas ni comillas: se escribe directo, sin el módulo csv
+        # (mismo formato que csv.writer, fin de línea \r\n)
+        with open(filename_csv, 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
             if self.hora_inicio:
-                w.writerow(["inicio_punto_cero", self.hora_inicio.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]])
-            w.writerow(["posicion", "epc", "hora_llegada", "tiempo_carrera_s", "antena", "rssi"])
-            for pos, tag in self.llegadas:
-                elapsed = self._tiempo_carrera(tag)
-                w.writerow([
-                    pos,
-                    tag.epc,
-                    tag.timestamp.strftime('%H:%M:%S.%f')[:-3],
-                    f"{elapsed:.3f}" if elapsed is not None else "",
-                    tag.antenna,
-                    tag.rssi
-                ])
+                f.write(f"inicio_punto_cero,{self.hora_inicio.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}\r\n")
+            f.write("posicion,epc,hora_llegada,tiempo_carrera_s,antena,rssi\r\n")
+            # Una sola llamada: writelines consume las líneas a medida que map las genera
+            f.writelines(map(self._linea_resultado, self._posiciones, self._tags, self._tiempos))
 
         print(f"\n💾 Resultados guardados en {filename_csv}")
         try:
@@ -323,7 +465,6 @@ if __name__ == "__main__":
     competencia = CompetenciaManager()
     if not reader.connect():
         exit(1)
-    reader.socket.settimeout(0.5)
     input("Pulsa Enter para iniciar la carrera (punto cero)... ")
     competencia.iniciar_carrera()
     print("Ctrl+C para finalizar y guardar.\n")
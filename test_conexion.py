@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 """Test conexión TCP al lector R300 YRM200. Muestra tags (EPC, Ant, RSSI) y rotación de antenas."""
+import selectors
 import socket
 import struct
 import time
@@ -78,9 +79,11 @@ def main():
 
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
         sock.settimeout(5)
         sock.connect((LECTOR_IP, LECTOR_PORT))
-        sock.settimeout(1.0)
+        sock.settimeout(None)  # la espera de datos la hace el selector
         print("✓ Conectado al lector.")
 
         send_set_output_power(sock, 30, 0x01)
@@ -106,44 +109,46 @@ def main():
         REENVIAR_CADA = 0.5
         antena_idx = 0
         antena_actual = _num_antena(ANTENNAS_ACTIVAS[0]) if ANTENNAS_ACTIVAS else 1
-        while True:
-            try:
-                data = sock.recv(4096)
-            except socket.timeout:
-                now = time.time()
-                if now - ultimo_cmd >= REENVIAR_CADA:
-                    ant_num = ANTENNAS_ACTIVAS[antena_idx % n_ant]
-                    ant = ant_num - 1
-                    antena_actual = _num_antena(ant_num)
-                    send_set_work_antenna(sock, ant, 0x01)
-                    print(f"  [Rotación → Antena {antena_actual}]", flush=True)
-                    time.sleep(0.2)
-                    send_cmd(sock, 0x89, 0x01, b'\xFF')
-                    time.sleep(0.25)
-                    send_cmd(sock, 0x80, 0x01, b'\xFF')
-                    time.sleep(0.3)
-                    send_cmd(sock, 0x90, 0x01)
-                    antena_idx += 1
-                    ultimo_cmd = now
-                if now - ultimo_aviso > 10:
-                    print("  (esperando datos... acerca un tag)", flush=True)
-                    ultimo_aviso = now
-                continue
+        with selectors.DefaultSelector() as sel:
+            sel.register(sock, selectors.EVENT_READ)
+            while True:
+                if not sel.select(1.0):
+                    # 1 s sin datos: rotar antena si toca y avisar cada 10 s
+                    now = time.time()
+                    if now - ultimo_cmd >= REENVIAR_CADA:
+                        ant_num = ANTENNAS_ACTIVAS[antena_idx % n_ant]
+                        ant = ant_num - 1
+                        antena_actual = _num_antena(ant_num)
+                        send_set_work_antenna(sock, ant, 0x01)
+                        print(f"  [Rotación → Antena {antena_actual}]", flush=True)
+                        time.sleep(0.2)
+                        send_cmd(sock, 0x89, 0x01, b'\xFF')
+                        time.sleep(0.25)
+                        send_cmd(sock, 0x80, 0x01, b'\xFF')
+                        time.sleep(0.3)
+                        send_cmd(sock, 0x90, 0x01)
+                        antena_idx += 1
+                        ultimo_cmd = now
+                    if now - ultimo_aviso > 10:
+                        print("  (esperando datos... acerca un tag)", flush=True)
+                        ultimo_aviso = now
+                    continue
 
-            if not data:
-                print("[Conexión cerrada por el lector]")
-                break
-            buf = bytearray(data)
-            while len(buf) >= 4 and buf[0] == 0xA0:
-                lon = buf[1]
-                frame_len = 2 + lon
-                if len(buf) < frame_len:
+                data = sock.recv(4096)
+                if not data:
+                    print("[Conexión cerrada por el lector]")
                     break
-                frame = bytes(buf[:frame_len])
-                buf = buf[frame_len:]
-                if frame[3] == 0x89 and lon >= 17:
-                    parse_tag_en_trama(frame, antena_rotacion=antena_actual)
-            continue
+                buf = bytearray(data)
+                while len(buf) >= 4 and buf[0] == 0xA0:
+                    lon = buf[1]
+                    frame_len = 2 + lon
+                    if len(buf) < frame_len:
+                        break
+                    frame = bytes(buf[:frame_len])
+                    buf = buf[frame_len:]
+                    if frame[3] == 0x89 and lon >= 17:
+                        parse_tag_en_trama(frame, antena_rotacion=antena_actual)
+                continue
 
     except socket.error as e:
         print(f"✗ Error de conexión: {e}")
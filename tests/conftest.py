@@ -0,0 +1,10 @@
+"""
+Configuración común de pytest para los tests de TEST-RFID.
+Asegura el import de los módulos desde la raíz del proyecto (una sola vez, antes de la colección).
+"""
+import sys
+from pathlib import Path
+
+_raiz = str(Path(__file__).resolve().parent.parent)
+if _raiz not in sys.path:
+    sys.path.insert(0, _raiz)
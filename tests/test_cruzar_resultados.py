@@ -3,18 +3,12 @@ Tests unitarios y de integración para cruzar_resultados.
 Ejecutar desde la raíz del proyecto: pytest tests/ -v
 """
 import csv
+import io
 import os
 import tempfile
-from pathlib import Path
 
 import pytest
 
-# Asegurar import desde raíz del proyecto
-import sys
-_raiz = Path(__file__).resolve().parent.parent
-if str(_raiz) not in sys.path:
-    sys.path.insert(0, str(_raiz))
-
 from cruzar_resultados import (
     _normalizar_epc,
     _cargar_nombres_por_epc,
@@ -26,6 +20,45 @@ from cruzar_resultados import (
 )
 
 
+_CABECERA_PLANILLA = ["epc_formateado", "nombre", "numero_corredor", "categoria_nombre", "genero", "distancia", "edad_min", "edad_max"]
+_CABECERA_RESULTADOS = ["posicion", "epc", "hora_llegada", "tiempo_carrera_s", "antena", "rssi"]
+
+
+def _escribir_filas(path: str, filas) -> None:
+    """Escribe filas CSV directo (los datos de prueba no llevan comas, comillas ni saltos de línea)."""
+    with open(path, "w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        for fila in filas:
+            f.write(",".join(fila) + "\r\n")
+
+
+def _csv_en_memoria(filas) -> io.StringIO:
+    """Mismo contenido que _escribir_filas, pero en un StringIO (sin tocar el disco)."""
+    return io.StringIO("".join(",".join(fila) + "\r\n" for fila in filas))
+
+
+@pytest.fixture(scope="session")
+def plantillas(tmp_path_factory) -> dict:
+    """CSV de entrada compartidos por los tests, escritos una sola vez por sesión.
+    cruzar_resultados solo los lee, así que cada test usa la ruta directamente (sin copiarlos)."""
+    carpeta = tmp_path_factory.mktemp("plantillas")
+    contenidos = {
+        "planilla_abc123": [
+            _CABECERA_PLANILLA,
+            ["ABC123", "", "1", "Libre", "M", "100", "", ""],
+        ],
+        "planilla_vacia": [["epc_formateado"]],
+        "resultados_abc123": [
+            _CABECERA_RESULTADOS,
+            ["1", "ABC123", "10:00:00", "12.5", "1", "-50"],
+        ],
+    }
+    rutas = {}
+    for nombre, filas in contenidos.items():
+        rutas[nombre] = str(carpeta / f"{nombre}.csv")
+        _escribir_filas(rutas[nombre], filas)
+    return rutas
+
+
 class TestNormalizarEpc:
     def test_mayusculas(self):
         assert _normalizar_epc("abc123") == "ABC123"
@@ -63,11 +96,27 @@ class TestCargarNombresPorEpc:
         with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False, encoding="utf-8", newline="") as f:
             w = csv.DictWriter(f, fieldnames=["epc_formateado", "nombre"])
             w.writeheader()
-            w.writerow({"epc_formateado": "  xyz789 ", "nombre": "Ana"})
+            w.writerow({"epc_formateado": "  abc789 ", "nombre": "Ana"})
+            path = f.name
+        try:
+            out = _cargar_nombres_por_epc(path)
+            assert out["ABC789"] == "Ana"
+        finally:
+            os.unlink(path)
+
+    def test_epc_normalizado_como_en_el_cruce(self):
+        epc_largo = "00" + "E2801160600002" + "0A1B2C3D4E"  # 26 hex con prefijo 00
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False, encoding="utf-8", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=["epc", "nombre"])
+            w.writeheader()
+            w.writerow({"epc": epc_largo, "nombre": "Largo"})
+            w.writerow({"epc": "ab-cd:12", "nombre": "Separadores"})
             path = f.name
         try:
             out = _cargar_nombres_por_epc(path)
-            assert out["XYZ789"] == "Ana"
+            assert out[_normalizar_epc(epc_largo)] == "Largo"
+            assert out["E28011606000020A1B2C3D4E"] == "Largo"
+            assert out["ABCD12"] == "Separadores"
         finally:
             os.unlink(path)
 
@@ -75,71 +124,74 @@ class TestCargarNombresPorEpc:
 class TestCruzarResultados:
     """Tests de integración del cruce con archivos temporales."""
 
+    @pytest.fixture(autouse=True)
+    def _directorio_temporal(self, tmp_path, monkeypatch):
+        # La clasificación que lanza el cruce escribe en el directorio actual: se aísla en tmp_path
+        monkeypatch.chdir(tmp_path)
+
     def _escribir_planilla(self, path: str, filas: list):
-        with open(path, "w", encoding="utf-8", newline="") as f:
-            w = csv.DictWriter(
-                f,
-                fieldnames=["epc_formateado", "nombre", "numero_corredor", "categoria_nombre", "genero", "distancia", "edad_min", "edad_max"],
-                extrasaction="ignore",
-            )
-            w.writeheader()
-            for row in filas:
-                w.writerow(row)
+        # Columnas que falten en una fila quedan vacías; las que sobren se ignoran
+        _escribir_filas(path, [_CABECERA_PLANILLA] + [[row.get(c, "") for c in _CABECERA_PLANILLA] for row in filas])
 
     def _escribir_resultados(self, path: str, inicio_punto_cero: str = None, filas: list = None):
-        with open(path, "w", encoding="utf-8", newline="") as f:
-            w = csv.writer(f)
-            if inicio_punto_cero:
-                w.writerow(["inicio_punto_cero", inicio_punto_cero])
-            w.writerow(["posicion", "epc", "hora_llegada", "tiempo_carrera_s", "antena", "rssi"])
-            for row in (filas or []):
-                w.writerow(row)
-
-    def _leer_salida(self, path: str) -> tuple:
-        with open(path, encoding="utf-8") as f:
-            r = csv.reader(f)
-            rows = list(r)
+        cabecera = [["inicio_punto_cero", inicio_punto_cero]] if inicio_punto_cero else []
+        _escribir_filas(path, cabecera + [_CABECERA_RESULTADOS] + (filas or []))
+
+    def _planilla_en_memoria(self, filas: list) -> io.StringIO:
+        return _csv_en_memoria([_CABECERA_PLANILLA] + [[row.get(c, "") for c in _CABECERA_PLANILLA] for row in filas])
+
+    def _resultados_en_memoria(self, inicio_punto_cero: str = None, filas: list = None) -> io.StringIO:
+        cabecera = [["inicio_punto_cero", inicio_punto_cero]] if inicio_punto_cero else []
+        return _csv_en_memoria(cabecera + [_CABECERA_RESULTADOS] + (filas or []))
+
+    def _leer_salida(self, salida) -> tuple:
+        """Lee la salida desde una ruta o desde el StringIO pasado como salida_csv."""
+        if isinstance(salida, io.StringIO):
+            return self._separar_salida(csv.reader(io.StringIO(salida.getvalue())))
+        with open(salida, encoding="utf-8", newline="") as f:
+            return self._separar_salida(csv.reader(f))
+
+    def _separar_salida(self, filas) -> tuple:
+        """Una sola pasada por las filas: inicio_punto_cero, cabecera y datos según la primera celda."""
         cabecera = None
         inicio = None
         datos = []
-        for row in rows:
+        for row in filas:
             if not row:
                 continue
             if row[0] == "inicio_punto_cero":
                 inicio = row[1] if len(row) > 1 else None
-                continue
-            if row[0] == "posicion":
+            elif row[0] == "posicion":
                 cabecera = row
-                continue
-            datos.append(row)
+            else:
+                datos.append(row)
         return cabecera, inicio, datos
 
-    def test_planilla_falta_retorna_false(self):
-        with tempfile.TemporaryDirectory() as tmp:
-            res = os.path.join(tmp, "res.csv")
-            out = os.path.join(tmp, "out.csv")
-            self._escribir_resultados(res, filas=[["1", "ABC123", "10:00:00", "12.5", "1", "-50"]])
-            ok = cruzar_resultados(planilla_csv=os.path.join(tmp, "no_existe.csv"), resultados_csv=res, salida_csv=out)
+    def test_planilla_falta_retorna_false(self, plantillas, tmp_path):
+        ok = cruzar_resultados(
+            planilla_csv=str(tmp_path / "no_existe.csv"),
+            resultados_csv=plantillas["resultados_abc123"],
+            salida_csv=str(tmp_path / "out.csv"),
+            nombres_csv=None,
+        )
         assert ok is False
 
-    def test_resultados_faltan_retorna_false(self):
-        with tempfile.TemporaryDirectory() as tmp:
-            plan = os.path.join(tmp, "planilla.csv")
-            out = os.path.join(tmp, "out.csv")
-            self._escribir_planilla(plan, [{"epc_formateado": "ABC123", "numero_corredor": "1", "categoria_nombre": "Libre", "genero": "M", "distancia": "100"}])
-            ok = cruzar_resultados(planilla_csv=plan, resultados_csv=os.path.join(tmp, "no_existe.csv"), salida_csv=out)
+    def test_resultados_faltan_retorna_false(self, plantillas, tmp_path):
+        ok = cruzar_resultados(
+            planilla_csv=plantillas["planilla_abc123"],
+            resultados_csv=str(tmp_path / "no_existe.csv"),
+            salida_csv=str(tmp_path / "out.csv"),
+            nombres_csv=None,
+        )
         assert ok is False
 
-    def test_planilla_vacia_retorna_false(self):
-        with tempfile.TemporaryDirectory() as tmp:
-            plan = os.path.join(tmp, "planilla.csv")
-            res = os.path.join(tmp, "res.csv")
-            out = os.path.join(tmp, "out.csv")
-            with open(plan, "w", encoding="utf-8", newline="") as f:
-                w = csv.DictWriter(f, fieldnames=["epc_formateado"])
-                w.writeheader()
-            self._escribir_resultados(res, filas=[["1", "ABC123", "10:00:00", "12.5", "1", "-50"]])
-            ok = cruzar_resultados(planilla_csv=plan, resultados_csv=res, salida_csv=out)
+    def test_planilla_vacia_retorna_false(self, plantillas, tmp_path):
+        ok = cruzar_resultados(
+            planilla_csv=plantillas["planilla_vacia"],
+            resultados_csv=plantillas["resultados_abc123"],
+            salida_csv=str(tmp_path / "out.csv"),
+            nombres_csv=None,
+        )
         assert ok is False
 
     def test_cruce_epc_en_planilla_si(self):
@@ -153,7 +205,7 @@ class TestCruzarResultados:
             self._escribir_resultados(res, inicio_punto_cero="2025-01-01 10:00:00", filas=[
                 ["1", "ABC123", "10:00:12.500", "12.500", "1", "-50"],
             ])
-            ok = cruzar_resultados(planilla_csv=plan, resultados_csv=res, salida_csv=out)
+            ok = cruzar_resultados(planilla_csv=plan, resultados_csv=res, salida_csv=out, nombres_csv=None)
             assert ok is True
             assert os.path.isfile(out), f"Salida no creada en {out}; archivos en tmp: {os.listdir(tmp)}"
             cab, inicio, datos = self._leer_salida(out)
@@ -165,40 +217,53 @@ class TestCruzarResultados:
             assert inicio == "2025-01-01 10:00:00"
 
     def test_cruce_epc_no_en_planilla_no(self):
-        with tempfile.TemporaryDirectory() as tmp:
-            plan = os.path.abspath(os.path.join(tmp, "planilla.csv"))
-            res = os.path.abspath(os.path.join(tmp, "res.csv"))
-            out = os.path.abspath(os.path.join(tmp, "out.csv"))
-            self._escribir_planilla(plan, [
-                {"epc_formateado": "SOLOESTE", "numero_corredor": "1", "categoria_nombre": "Libre", "genero": "M", "distancia": "100"},
-            ])
-            self._escribir_resultados(res, filas=[
-                ["1", "OTROEPC999", "10:00:00", "0", "1", "-50"],
-            ])
-            ok = cruzar_resultados(planilla_csv=plan, resultados_csv=res, salida_csv=out)
-            assert ok is True
-            assert os.path.isfile(out)
-            cab, _, datos = self._leer_salida(out)
-            assert len(datos) == 1
-            assert datos[0][1] == "OTROEPC999"
-            assert datos[0][-1] == "no"
+        plan = self._planilla_en_memoria([
+            {"epc_formateado": "SOLOESTE", "numero_corredor": "1", "categoria_nombre": "Libre", "genero": "M", "distancia": "100"},
+        ])
+        res = self._resultados_en_memoria(filas=[
+            ["1", "OTROEPC999", "10:00:00", "0", "1", "-50"],
+        ])
+        out = io.StringIO()
+        ok = cruzar_resultados(planilla_csv=plan, resultados_csv=res, salida_csv=out, nombres_csv=None)
+        assert ok is True
+        cab, _, datos = self._leer_salida(out)
+        assert len(datos) == 1
+        assert datos[0][1] == "OTROEPC999"
+        assert datos[0][-1] == "no"
 
     def test_cruce_normaliza_epc(self):
-        with tempfile.TemporaryDirectory() as tmp:
-            plan = os.path.abspath(os.path.join(tmp, "planilla.csv"))
-            res = os.path.abspath(os.path.join(tmp, "res.csv"))
-            out = os.path.abspath(os.path.join(tmp, "out.csv"))
-            self._escribir_planilla(plan, [
-                {"epc_formateado": "abc123", "numero_corredor": "1", "categoria_nombre": "Libre", "genero": "F", "distancia": "50"},
-            ])
-            self._escribir_resultados(res, filas=[
-                ["1", "  ABC123  ", "10:00:00", "10", "1", "-48"],
-            ])
-            ok = cruzar_resultados(planilla_csv=plan, resultados_csv=res, salida_csv=out)
-            assert ok is True
-            assert os.path.isfile(out)
-            _, _, datos = self._leer_salida(out)
-            assert datos[0][-1] == "sí"
+        plan = self._planilla_en_memoria([
+            {"epc_formateado": "abc123", "numero_corredor": "1", "categoria_nombre": "Libre", "genero": "F", "distancia": "50"},
+        ])
+        res = self._resultados_en_memoria(filas=[
+            ["1", "  ABC123  ", "10:00:00", "10", "1", "-48"],
+        ])
+        out = io.StringIO()
+        ok = cruzar_resultados(planilla_csv=plan, resultados_csv=res, salida_csv=out, nombres_csv=None)
+        assert ok is True
+        _, _, datos = self._leer_salida(out)
+        assert datos[0][-1] == "sí"
+
+    def test_cruce_en_memoria_con_nombres(self):
+        plan = self._planilla_en_memoria([
+            {"epc_formateado": "ABC123", "nombre": "Planilla", "numero_corredor": "1", "categoria_nombre": "Libre", "genero": "M", "distancia": "100"},
+        ])
+        nombres = _csv_en_memoria([["epc", "nombre", "categoria", "sexo"], ["abc123", "Desde StringIO", "Master", "F"]])
+        res = self._resultados_en_memoria(inicio_punto_cero="2025-01-01 10:00:00", filas=[
+            ["1", "ABC123", "10:00:12.500", "12.500", "1", "-50"],
+        ])
+        out = io.StringIO()
+        ok = cruzar_resultados(planilla_csv=plan, resultados_csv=res, salida_csv=out, nombres_csv=nombres)
+        assert ok is True
+        assert not out.closed
+        cab, inicio, datos = self._leer_salida(out)
+        assert inicio == "2025-01-01 10:00:00"
+        fila = dict(zip(cab, datos[0]))
+        assert fila["nombre"] == "Desde StringIO"
+        assert fila["categoria_nombre"] == "Master"
+        assert fila["genero"] == "F"
+        assert fila["tiempo_carrera"] == "00:00:12.500"
+        assert fila["epc_en_planilla"] == "sí"
 
     def test_cruce_con_nombres_csv_opcional(self):
         with tempfile.TemporaryDirectory() as tmp:
@@ -226,19 +291,57 @@ class TestCruzarResultados:
             res = os.path.abspath(os.path.join(tmp, "res.csv"))
             out = os.path.abspath(os.path.join(tmp, "out.csv"))
             self._escribir_planilla(plan, [
-                {"epc_formateado": "UNO", "numero_corredor": "1", "categoria_nombre": "A", "genero": "M", "distancia": "100"},
-                {"epc_formateado": "TRES", "numero_corredor": "3", "categoria_nombre": "A", "genero": "M", "distancia": "100"},
+                {"epc_formateado": "0A1", "numero_corredor": "1", "categoria_nombre": "A", "genero": "M", "distancia": "100"},
+                {"epc_formateado": "0A3", "numero_corredor": "3", "categoria_nombre": "A", "genero": "M", "distancia": "100"},
             ])
             self._escribir_resultados(res, filas=[
-                ["1", "UNO", "10:00:01", "1", "1", "-50"],
-                ["2", "NONEXISTE", "10:00:02", "2", "1", "-50"],
-                ["3", "TRES", "10:00:03", "3", "1", "-50"],
+                ["1", "0A1", "10:00:01", "1", "1", "-50"],
+                ["2", "0B2", "10:00:02", "2", "1", "-50"],
+                ["3", "0A3", "10:00:03", "3", "1", "-50"],
             ])
-            ok = cruzar_resultados(planilla_csv=plan, resultados_csv=res, salida_csv=out)
+            ok = cruzar_resultados(planilla_csv=plan, resultados_csv=res, salida_csv=out, nombres_csv=None)
             assert ok is True
             assert os.path.isfile(out)
             _, _, datos = self._leer_salida(out)
             assert len(datos) == 3
-            assert datos[0][-1] == "sí" and datos[0][1] == "UNO"
-            assert datos[1][-1] == "no" and datos[1][1] == "NONEXISTE"
-            assert datos[2][-1] == "sí" and datos[2][1] == "TRES"
+            assert datos[0][-1] == "sí" and datos[0][1] == "0A1"
+            assert datos[1][-1] == "no" and datos[1][1] == "0B2"
+            assert datos[2][-1] == "sí" and datos[2][1] == "0A3"
+
+    def test_planilla_sin_columnas_y_filas_cortas(self):
+        # Sin nombre, genero ni edades; la segunda fila termina antes de la distancia
+        plan = _csv_en_memoria([
+            ["epc_formateado", "numero_corredor", "categoria_nombre", "distancia"],
+            ["0A1", "1", "A", "100"],
+            ["0A3", "3"],
+        ])
+        res = self._resultados_en_memoria(filas=[
+            ["1", "0A1", "10:00:01", "1", "1", "-50"],
+            ["2", "0A3", "10:00:03", "3", "1", "-50"],
+        ])
+        out = io.StringIO()
+        ok = cruzar_resultados(planilla_csv=plan, resultados_csv=res, salida_csv=out, nombres_csv=None)
+        assert ok is True
+        cab, _, datos = self._leer_salida(out)
+        filas = [dict(zip(cab, row)) for row in datos]
+        assert [f["epc_en_planilla"] for f in filas] == ["sí", "sí"]
+        assert (filas[0]["nombre"], filas[0]["genero"], filas[0]["distancia"]) == ("", "", "100")
+        assert (filas[1]["numero_corredor"], filas[1]["categoria_nombre"], filas[1]["distancia"]) == ("3", "", "")
+        assert filas[1]["edad_min"] == filas[1]["edad_max"] == ""
+
+    def test_inicio_punto_cero_despues_de_los_datos(self):
+        plan = self._planilla_en_memoria([
+            {"epc_formateado": "0A1", "numero_corredor": "1", "categoria_nombre": "A", "genero": "M", "distancia": "100"},
+        ])
+        res = _csv_en_memoria([
+            _CABECERA_RESULTADOS,
+            ["1", "0A1", "10:00:01", "1", "1", "-50"],
+            ["inicio_punto_cero", "2025-01-01 10:00:00"],
+        ])
+        out = io.StringIO()
+        ok = cruzar_resultados(planilla_csv=plan, resultados_csv=res, salida_csv=out, nombres_csv=None)
+        assert ok is True
+        filas = list(csv.reader(io.StringIO(out.getvalue())))
+        assert filas[0] == ["inicio_punto_cero", "2025-01-01 10:00:00"]
+        assert filas[1][0] == "posicion"
+        assert [row[1] for row in filas[2:]] == ["0A1"]
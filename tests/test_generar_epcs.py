@@ -0,0 +1,101 @@
+"""
+Tests unitarios para generar_epcs: EPCGenerator (tags generados y exportaciones).
+Ejecutar desde la raíz del proyecto: pytest tests/ -v
+"""
+import csv
+import json
+
+import pytest
+
+from generar_epcs import EPCGenerator
+
+
+class TestTagsGenerados:
+    def test_generar_epc_devuelve_el_registro_guardado(self):
+        gen = EPCGenerator("2026")
+        tag = gen.generar_epc("INF_A", "F", "2K", 7)
+        assert gen.tags_generados == [tag]
+        assert gen.tags_generados[0] is tag
+
+    def test_lista_modificable_se_refleja_en_exportaciones(self, tmp_path):
+        gen = EPCGenerator("2026")
+        gen.generar_epc("INF_A", "F", "2K", 1)
+        gen.generar_epc("INF_A", "M", "2K", 2)
+        gen.tags_generados[0]["numero_corredor"] = 99
+        del gen.tags_generados[1]
+        salida = tmp_path / "tags.csv"
+        gen.exportar_csv(str(salida))
+        with open(salida, encoding="utf-8", newline="") as f:
+            filas = list(csv.DictReader(f))
+        assert len(filas) == 1
+        assert filas[0]["numero_corredor"] == "99"
+
+    def test_asignar_lista(self):
+        gen = EPCGenerator("2026")
+        gen.generar_epc("INF_A", "F", "2K", 1)
+        gen.tags_generados = []
+        assert gen.tags_generados == []
+        gen.generar_epc("INF_A", "F", "2K", 2)
+        assert [t["numero_corredor"] for t in gen.tags_generados] == [2]
+
+
+class TestGenerarEpcsBatch:
+    def test_mismos_epcs_que_generar_epc(self):
+        categorias = ["INF_A", "INF_A", "MAY_A", "INF_A"]
+        generos = ["F", "M", "F", "M"]
+        distancias = ["1K", "2K", "3K", "5K"]
+        numeros = [1, 255, 256, 999]
+        uno_a_uno = EPCGenerator("2026")
+        esperado = [uno_a_uno.generar_epc(c, g, d, n) for c, g, d, n in zip(categorias, generos, distancias, numeros)]
+        lote = EPCGenerator("2026")
+        obtenido = lote.generar_epcs_batch(categorias, generos, distancias, numeros)
+        assert obtenido == esperado
+        assert [t["epc"] for t in obtenido] == [t["epc"] for t in esperado]
+        assert [t["checksum"] for t in obtenido] == [t["checksum"] for t in esperado]
+        for tag in obtenido:
+            assert EPCGenerator.calcular_checksum(tag["epc"][:22]) == tag["checksum"]
+        assert lote.tags_generados == obtenido
+
+    def test_columnas_de_distinta_longitud(self):
+        with pytest.raises(ValueError):
+            EPCGenerator("2026").generar_epcs_batch(["INF_A"], ["F", "M"], ["2K"], [1])
+
+    def test_valor_invalido_no_genera_nada(self):
+        gen = EPCGenerator("2026")
+        with pytest.raises(ValueError):
+            gen.generar_epcs_batch(["INF_A", "INF_A"], ["F", "F"], ["2K", "2K"], [1, 1000])
+        assert gen.tags_generados == []
+
+
+class TestExportarTodo:
+    def test_ida_y_vuelta(self, tmp_path):
+        gen = EPCGenerator("2026")
+        gen.generar_lote_carreras([
+            {"distancia": "2K", "categorias": [("INF_A", "F", 3), ("INF_A", "M", 2)]},
+            {"distancia": "3K", "categorias": [("MAY_A", "F", 1)]},
+        ])
+        writer = tmp_path / "epcs.txt"
+        planilla = tmp_path / "tags.csv"
+        completo = tmp_path / "tags.json"
+        gen.exportar_todo(str(writer), str(planilla), str(completo))
+        tags = gen.tags_generados
+
+        assert writer.read_text(encoding="utf-8").splitlines() == [t["epc"] for t in tags]
+
+        with open(planilla, encoding="utf-8", newline="") as f:
+            filas = list(csv.DictReader(f))
+        assert len(filas) == len(tags)
+        for fila, tag in zip(filas, tags):
+            assert fila == {campo: str(tag[campo]) for campo in fila}
+
+        with open(completo, encoding="utf-8") as f:
+            datos = json.load(f)
+        assert datos["evento"] == "2026"
+        assert datos["total_tags"] == len(tags)
+        assert datos["tags"] == tags
+
+    def test_sin_json(self, tmp_path):
+        gen = EPCGenerator("2026")
+        gen.generar_epc("INF_A", "F", "2K", 1)
+        gen.exportar_todo(str(tmp_path / "epcs.txt"), str(tmp_path / "tags.csv"), None)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["epcs.txt", "tags.csv"]
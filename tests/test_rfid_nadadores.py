@@ -4,18 +4,17 @@ Ejecutar desde la raíz del proyecto: pytest tests/ -v
 """
 import csv
 import os
+import random
+import socket
 import tempfile
+import threading
+import time
 from datetime import datetime
-from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 
-_raiz = Path(__file__).resolve().parent.parent
-if str(_raiz) not in __import__("sys").path:
-    __import__("sys").path.insert(0, str(_raiz))
-
-from rfid_nadadores import RFIDTag, CompetenciaManager
+from rfid_nadadores import RFIDTag, RFIDReader, CompetenciaManager
 
 
 def _tag(epc_hex: str, rssi_raw: int = 127, antenna: int = 1, ts: datetime = None) -> RFIDTag:
@@ -30,6 +29,38 @@ def _tag(epc_hex: str, rssi_raw: int = 127, antenna: int = 1, ts: datetime = Non
     )
 
 
+def _trama_inventario(epc_hex: str, rssi_raw: int = 0x50) -> bytes:
+    """Trama 0x89 de inventario (20 bytes) tal como la lee parse_inventory_tag: EPC desde data[2]."""
+    data = bytes([0x00, 0x30]) + bytes.fromhex(epc_hex) + bytes([rssi_raw])
+    cuerpo = bytes([RFIDReader.HEADER, len(data) + 3, 0x01, 0x89]) + data
+    return cuerpo + bytes([RFIDReader.checksum(cuerpo)])
+
+
+def _leer_trozos(trozos, reader: RFIDReader = None, pausa: float = 0.02):
+    """Envía los trozos por un socketpair (uno por recv, con una pausa entre ellos),
+    cierra el extremo emisor y devuelve (reader, EPCs leídos por read_tags_continuous)."""
+    reader = reader or RFIDReader("127.0.0.1")
+    reader.send_command = lambda *a, **k: None  # sin rotación de antena hacia el par
+    lector, emisor = socket.socketpair()
+    reader.socket = lector
+
+    def _enviar():
+        for trozo in trozos:
+            emisor.sendall(trozo)
+            time.sleep(pausa)
+        emisor.close()
+
+    hilo = threading.Thread(target=_enviar)
+    leidos = []
+    try:
+        hilo.start()
+        reader.read_tags_continuous(callback=lambda tag: leidos.append(tag.epc), duration=5)
+    finally:
+        hilo.join()
+        lector.close()
+    return reader, leidos
+
+
 class TestCompetenciaManager:
     def test_iniciar_carrera_fija_punto_cero(self):
         m = CompetenciaManager()
@@ -85,6 +116,101 @@ class TestCompetenciaManager:
         assert res[0]["tiempo_carrera_s"] is not None
         assert 2.9 <= res[0]["tiempo_carrera_s"] <= 3.1
 
+    def test_tiempo_carrera_con_reloj_monotonico(self):
+        m = CompetenciaManager()
+        with patch("rfid_nadadores._monotonic_ns", return_value=1_000_000_000):
+            m.iniciar_carrera()
+        # Hora de pared desfasada (p. ej. ajuste NTP): el tiempo de carrera sale del reloj monotónico
+        t = RFIDTag(bytes.fromhex("A" * 24), 127, 1, timestamp=datetime(2000, 1, 1), ts_ns=3_500_000_000)
+        m.registrar_llegada(t)
+        res = m.obtener_resultados()
+        assert res[0]["tiempo_carrera_s"] == 2.5
+        assert res[0]["timestamp"] == "2000-01-01T00:00:00"
+
+    def test_tiempo_carrera_punto_cero_posterior_recalcula(self):
+        m = CompetenciaManager()
+        t = _tag("A" * 24, ts=datetime(2025, 1, 15, 10, 0, 3))
+        m.registrar_llegada(t)
+        m.hora_inicio = datetime(2025, 1, 15, 10, 0, 0)
+        res = m.obtener_resultados()
+        assert 2.9 <= res[0]["tiempo_carrera_s"] <= 3.1
+
+
+class TestLecturaContinua:
+    """Parser de read_tags_continuous sobre un socketpair (tramas partidas, basura, compactación)."""
+    EPCS = ["E2801170000002" + "%010X" % i for i in range(1, 4)]
+
+    def test_tramas_partidas_entre_recv(self):
+        datos = b"".join(_trama_inventario(e) for e in self.EPCS)
+        _, leidos = _leer_trozos([datos[i:i + 1] for i in range(len(datos))], pausa=0.001)
+        assert leidos == self.EPCS
+
+    def test_basura_antes_de_cabecera_resincroniza(self):
+        t1, t2 = (_trama_inventario(e) for e in self.EPCS[:2])
+        _, leidos = _leer_trozos([b"\x00\x13\x37" + t1, b"\xFF" * 40, b"\x01\x02" + t2])
+        assert leidos == self.EPCS[:2]
+
+    def test_byte_de_longitud_truncado(self):
+        t1, t2 = (_trama_inventario(e) for e in self.EPCS[:2])
+        # La cabecera llega sola; la longitud y el resto, en el siguiente recv
+        _, leidos = _leer_trozos([t1 + t2[:1], t2[1:]])
+        assert leidos == self.EPCS[:2]
+
+    def test_trama_incompleta_al_cerrar_no_se_emite(self):
+        t1, t2 = (_trama_inventario(e) for e in self.EPCS[:2])
+        reader, leidos = _leer_trozos([t1, t2[:1]])
+        assert leidos == self.EPCS[:1]
+        assert reader.running is False
+
+    def test_trama_que_cruza_la_compactacion(self):
+        reader = RFIDReader("127.0.0.1")
+        reader.buffer = bytearray(64)
+        reader._rxmv = memoryview(reader.buffer)
+        t1, t2, t3 = (_trama_inventario(e) for e in self.EPCS)
+        # Tras el primer recv quedan 64 - 35 = 29 bytes libres (< 32): la media trama se mueve al inicio
+        with patch("rfid_nadadores.RX_MIN_LIBRE", 32):
+            _, leidos = _leer_trozos([t1 + t2[:15], t2[15:] + t3], reader=reader)
+        assert leidos == self.EPCS
+
+    @pytest.mark.parametrize("min_libre, pos, wpos", [(32, 0, 15), (16, 20, 35)])
+    def test_umbral_rx_min_libre(self, min_libre, pos, wpos):
+        reader = RFIDReader("127.0.0.1")
+        reader.buffer = bytearray(64)
+        reader._rxmv = memoryview(reader.buffer)
+        t1, t2 = (_trama_inventario(e) for e in self.EPCS[:2])
+        # 29 bytes libres: por debajo de 32 se compacta; con 16 lo pendiente sigue en su lugar
+        with patch("rfid_nadadores.RX_MIN_LIBRE", min_libre):
+            _, leidos = _leer_trozos([t1 + t2[:15]], reader=reader)
+        assert leidos == self.EPCS[:1]
+        assert (reader._pos, reader._wpos) == (pos, wpos)
+        assert reader.buffer[pos:wpos] == t2[:15]
+
+    def test_busqueda_de_cabecera_entre_recv(self):
+        t1, t2, t3 = (_trama_inventario(e) for e in self.EPCS)
+        # Un recv entero sin cabecera se descarta; la búsqueda sigue desde lo nuevo
+        _, leidos = _leer_trozos([b"\x11" * 30, t1 + b"\x22" * 7, b"\x33" * 5 + t2 + t3[:3], t3[3:]])
+        assert leidos == self.EPCS
+
+    def test_trozos_al_azar_con_buffer_chico(self):
+        rng = random.Random(1234)
+        epcs = ["E28011700000%012X" % i for i in range(60)]
+        datos = bytearray()
+        for e in epcs:
+            datos += bytes(rng.randrange(0x00, 0xA0) for _ in range(rng.randrange(4)))
+            datos += _trama_inventario(e)
+        trozos = []
+        i = 0
+        while i < len(datos):
+            n = rng.randrange(1, 40)
+            trozos.append(bytes(datos[i:i + n]))
+            i += n
+        reader = RFIDReader("127.0.0.1")
+        reader.buffer = bytearray(96)
+        reader._rxmv = memoryview(reader.buffer)
+        with patch("rfid_nadadores.RX_MIN_LIBRE", 40):
+            _, leidos = _leer_trozos(trozos, reader=reader, pausa=0.001)
+        assert leidos == epcs
+
 
 class TestGuardarResultados:
     """Tests del guardado CSV (sin invocar cruzar_resultados)."""